@@ -0,0 +1,61 @@
+"""Action dispatch: caller-thread cost of an `open` vs blocking on it.
+
+Uses RecordingLauncher so it runs anywhere; `--delay-ms` stands in for how
+long `open things:///...` takes to return (50-150 ms on a busy Mac). Also
+fires a burst at a launcher that hangs, to show timeouts and dropping keep
+the caller unaffected.
+
+    python -m benchmarks.bench_actions --delay-ms 80
+"""
+import argparse
+import logging
+import statistics
+import time
+
+from timebox.actions import ActionDispatcher, RecordingLauncher
+from timebox.metrics import SyncMetrics
+
+URL = "things:///show?id=6F0A6B8D-55E3-4C59-9A43-2E9A71C7F0C1"
+
+
+def caller_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples), max(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--delay-ms", type=float, default=80)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    launcher = RecordingLauncher(delay=args.delay_ms / 1000)
+    blocking = caller_ms(lambda: launcher(["open", URL], 10.0), args.repeat)
+
+    metrics = SyncMetrics(enabled=True)
+    actions = ActionDispatcher(launcher, metrics=metrics)
+    dispatched = caller_ms(lambda: actions.open_url(URL), args.repeat)
+    actions.shutdown()
+    latency = metrics.action_histograms["open_url"]
+
+    print(f"{'':<12} {'p50':>9} {'max':>9}   on the calling thread")
+    print(f"{'blocking':<12} {blocking[0]:7.3f}ms {blocking[1]:7.3f}ms")
+    print(f"{'dispatched':<12} {dispatched[0]:7.3f}ms {dispatched[1]:7.3f}ms")
+    print(f"\n{latency.count} opens done, mean {latency.sum / latency.count * 1000:.0f} ms "
+          f"from submit to exit with 2 workers")
+
+    logging.disable(logging.WARNING)  # one line per timeout and drop
+    metrics = SyncMetrics(enabled=True)
+    actions = ActionDispatcher(RecordingLauncher(delay=60), timeout=0.2, max_pending=8, metrics=metrics)
+    burst = caller_ms(lambda: actions.open_url(URL), 50)
+    actions.shutdown()
+    outcomes = {key.split(":")[2]: value for key, value in metrics.counters.items()}
+    print(f"\nhung launcher, 50 opens: caller max {burst[1]:.3f} ms, outcomes {outcomes}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Control socket: answering from the app's memory vs re-reading Things.
+
+A ControlServer serves status and tasks from a task map and plan read once
+from the fixture, the way the running app does. Status is measured over one
+kept-open connection (a status bar polling every second) and with a new
+connection per request (one `timebox status`, minus interpreter start). The
+direct column is what `timebox list` does without the app: query and plan
+from scratch. Exits non-zero if a status round trip takes a millisecond or
+more at the median.
+
+    python -m benchmarks.bench_control --tasks 20000 --today 150
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.cli import load_plan, load_tasks, tasks_json
+from timebox.control import ControlClient, ControlServer
+from timebox.countdown import Countdown
+
+
+def timed_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "main.sqlite")
+        create_database(db, tasks=args.tasks, today=args.today)
+        tasks, plan = load_tasks(db), load_plan(db, 7)
+
+        countdown = Countdown()
+        countdown.start(25 * 60)
+        server = ControlServer(os.path.join(tmp, "control.sock"), {
+            "status": lambda: {"state": "running", "display": countdown.title(),
+                               "remaining": round(countdown.remaining(), 1)},
+            "tasks": lambda days=None: tasks_json(tasks, plan),
+        })
+        server.start()
+        try:
+            with ControlClient(server.path) as client:
+                kept_open = timed_ms(lambda: client.request("status"), args.repeat)
+                listed = timed_ms(lambda: client.request("tasks", "7"), args.repeat // 10)
+
+            def connect_and_ask():
+                with ControlClient(server.path) as client:
+                    client.request("status")
+
+            connecting = timed_ms(connect_and_ask, args.repeat // 4)
+        finally:
+            server.stop()
+
+        direct = timed_ms(lambda: (load_tasks(db), load_plan(db, 7)), 20)
+
+    print(f"{len(tasks)} projects, {args.today} Today tasks in a {args.tasks}-task library\n")
+    print(f"{'':<26} {'p50':>9} {'p99':>9}")
+    for name, (p50, p99) in (("status, kept open", kept_open),
+                             ("status, new connection", connecting),
+                             ("tasks over the socket", listed),
+                             ("tasks read from Things", direct)):
+        print(f"{name:<26} {p50:7.3f}ms {p99:7.3f}ms")
+
+    if kept_open[0] >= 1.0:
+        print("status round trip over 1 ms")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Timer: tick counting vs the monotonic Countdown, with main-thread stalls.
+
+The old timer counted 1-second callbacks, so every stalled or coalesced
+callback made the box longer. Countdown derives the remaining time from the
+clock and only wakes when the title changes. Before timing anything, a
+scripted box on a ManualClock checks the engine itself: pause/resume
+accounting, titles on both sides of the coarse boundary and the wakeups
+that land on them. Exits non-zero if any value is off.
+
+    python -m benchmarks.bench_countdown --minutes 50 --coarse 5
+"""
+import argparse
+import random
+
+from timebox.countdown import SLACK, Countdown
+from timebox.scheduler import ManualClock
+
+
+def check_engine():
+    """Step a 25 minute box through pauses and the coarse boundary; returns (step, got, expected)"""
+    coarse_above = 300
+    clock = ManualClock()
+    countdown = Countdown(clock, coarse_above=coarse_above)
+    failures = []
+
+    def expect(step, got, expected):
+        if got != expected:
+            failures.append((step, got, expected))
+
+    countdown.start(25 * 60)
+    expect("start", countdown.title(), "25m")
+    clock.advance(100)
+    expect("running", (countdown.remaining(), countdown.title()), (1400, "24m"))
+    expect("coarse wakeup", countdown.next_wakeup(), 20 + SLACK)
+
+    countdown.pause()
+    countdown.pause()
+    clock.advance(500)
+    expect("paused", (countdown.remaining(), countdown.title()), (1400, "24m"))
+    expect("paused wakeup", countdown.next_wakeup(), None)
+    countdown.resume()
+    clock.advance(40)
+    countdown.resume()
+    clock.advance(30)
+    expect("resumed twice", countdown.remaining(), 1330)
+
+    # Coarse down to coarse_above, seconds from there on
+    clock.advance(1330 - coarse_above - 30)
+    expect("above boundary", (countdown.title(), countdown.next_wakeup()), (" 6m", 30 + SLACK))
+    clock.advance(30)
+    expect("at boundary", (countdown.title(), countdown.next_wakeup()), (" 5:00", 1 + SLACK))
+    clock.advance(countdown.next_wakeup())
+    expect("past boundary", countdown.title(), " 4:59")
+
+    countdown.pause()
+    clock.advance(3600)
+    countdown.resume()
+    expect("second pause", round(countdown.remaining(), 6), coarse_above - 1 - SLACK)
+    clock.advance(coarse_above)
+    expect("expired", (countdown.expired(), countdown.title(), countdown.next_wakeup()), (True, " 0:00", 0.0))
+    countdown.stop()
+    expect("stopped", (countdown.running, countdown.remaining(), countdown.expired()), (False, 0.0, False))
+    return failures
+
+
+def stalls(rng, seconds, rate=0.02):
+    """Main-thread stalls (sync, `open`) keyed by second, lasting 0.5-3 s"""
+    return {t: rng.uniform(0.5, 3.0) for t in range(seconds) if rng.random() < rate}
+
+
+def run_counting(seconds, stall_at):
+    """NSTimer-style repeating 1 s timer: missed fires are dropped, not queued"""
+    now, count, wakeups = 0.0, 0, 0
+    while seconds - count >= 0:
+        now += 1.0
+        now += stall_at.get(int(now), 0.0)
+        count += 1
+        wakeups += 1
+    return now, wakeups
+
+
+def run_countdown(seconds, stall_at, coarse_above):
+    clock = ManualClock()
+    countdown = Countdown(clock, coarse_above=coarse_above)
+    countdown.start(seconds)
+    wakeups = 0
+    while not countdown.expired():
+        clock.advance(countdown.next_wakeup())
+        clock.advance(stall_at.get(int(clock()), 0.0))
+        countdown.title()
+        wakeups += 1
+    return clock(), wakeups
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--minutes", type=int, default=50)
+    parser.add_argument("--coarse", type=float, default=5,
+                        help="minutes left below which coarse mode shows seconds")
+    args = parser.parse_args()
+
+    failures = check_engine()
+    for step, got, expected in failures:
+        print(f"{step}: got {got!r}, expected {expected!r}")
+    if failures:
+        raise SystemExit(f"{len(failures)} engine failures")
+    print("engine: pause/resume and coarse boundary, no failures\n")
+
+    seconds = args.minutes * 60
+    stall_at = stalls(random.Random(0), seconds * 2)
+    print(f"{args.minutes} min box, {len(stall_at)} stalls\n")
+    for name, (ended, wakeups) in (
+        ("counting", run_counting(seconds, stall_at)),
+        ("countdown", run_countdown(seconds, stall_at, None)),
+        ("coarse", run_countdown(seconds, stall_at, args.coarse * 60)),
+    ):
+        print(f"{name:<10} ended {ended - seconds:+7.1f} s late   {wakeups:5d} wakeups")
+
+
+if __name__ == "__main__":
+    main()
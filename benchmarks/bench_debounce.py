@@ -0,0 +1,85 @@
+"""Write bursts: leading-edge 2s cooldown vs the trailing-edge SyncScheduler.
+
+Replays bursts of database writes on a ManualClock and reports how many syncs
+each strategy runs and how many bursts end with a stale menu (the last write
+was never synced).
+
+    python -m benchmarks.bench_debounce --bursts 500
+"""
+import argparse
+import random
+
+from timebox.scheduler import ManualClock, SyncScheduler
+
+STEP = 0.01
+
+
+def bursts(rng, count):
+    """Yield (gap before burst, [event offsets]) in seconds"""
+    for _ in range(count):
+        size = rng.randrange(1, 60)
+        spread = rng.choice((0.05, 0.5, 3.0, 10.0))
+        yield rng.uniform(5, 60), sorted(rng.uniform(0, spread) for _ in range(size))
+
+
+def run_cooldown(schedule, cooldown=2.0):
+    last_sync = float("-inf")
+    syncs = stale = 0
+    now = 0.0
+    for gap, offsets in schedule:
+        now += gap
+        synced_last = False
+        for offset in offsets:
+            if now + offset - last_sync > cooldown:
+                last_sync = now + offset
+                syncs += 1
+                synced_last = True
+            else:
+                synced_last = False
+        stale += not synced_last
+        now += offsets[-1]
+    return syncs, stale
+
+
+def run_scheduler(schedule):
+    clock = ManualClock()
+    version = {"written": 0, "synced": 0}
+
+    def work(force):
+        version["synced"] = version["written"]
+
+    scheduler = SyncScheduler(work, clock=clock)
+    stale = 0
+    for gap, offsets in schedule:
+        clock.advance(gap)
+        start = clock()
+        for offset in offsets:
+            while clock() < start + offset:
+                clock.advance(STEP)
+                scheduler.run_due()
+            version["written"] += 1
+            scheduler.notify()
+        # Let the burst settle
+        while scheduler.due_in() is not None:
+            clock.advance(STEP)
+            scheduler.run_due()
+        stale += version["synced"] != version["written"]
+    return scheduler.runs, stale
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bursts", type=int, default=500)
+    args = parser.parse_args()
+
+    schedule = list(bursts(random.Random(0), args.bursts))
+    events = sum(len(offsets) for _, offsets in schedule)
+    print(f"{args.bursts} bursts, {events} writes\n")
+    for name, (syncs, stale) in (("cooldown", run_cooldown(schedule)),
+                                 ("scheduler", run_scheduler(schedule))):
+        print(f"{name:<10} {syncs:6d} syncs ({syncs / args.bursts:.2f}/burst)   "
+              f"{stale:5d} bursts left stale")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,165 @@
+"""Session history: tick-path cost, batched writes, indexed analytics, export memory.
+
+Fills a store with years of synthetic boxes through HistoryStore (batched on
+its writer thread) and compares that with committing every session on the
+caller's thread. Then times the 90-day calibration queries with and without
+the covering index, and measures export peak memory for a quarter of the
+history and for all of it, which must stay flat. Exits non-zero if the index
+stops helping or export memory grows with the row count.
+
+    python -m benchmarks.bench_history --sessions 100000 --years 3
+"""
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from timebox.history import (
+    INSERT_SQL, HistoryStore, Session, SessionRecorder, calibration, connect, export_csv,
+    export_json,
+)
+
+ESTIMATES = (5, 10, 15, 25, 30, 45, 60, 90)
+
+
+def random_sessions(rng, count, years, now):
+    start = now - years * 365 * 86400
+    step = (now - start) / count
+    tasks = [(f"task-{i}", f"Project {i % 40}", rng.choice(ESTIMATES)) for i in range(count // 3)]
+    for i in range(count):
+        task, project, estimate = rng.choice(tasks)
+        actual = estimate * 60 * rng.uniform(0.3, 1.0)
+        started = start + i * step
+        pauses = rng.choice((0, 0, 0, 1, 2))
+        paused = pauses * rng.uniform(30, 300)
+        yield Session(started, started + actual + paused, task, project, estimate, estimate * 60.0,
+                      actual, paused, pauses, 0.0, rng.choice(("expired", "expired", "stopped")))
+
+
+def caller_us(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def timed_ms(fn, repeat=5):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def export_peak(conn, export, since):
+    with open(os.devnull, "w") as out:
+        tracemalloc.start()
+        count = export(conn, out, since)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    return count, peak / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sessions", type=int, default=100000)
+    parser.add_argument("--years", type=float, default=3)
+    parser.add_argument("--boxes", type=int, default=2000, help="boxes ended on the caller thread")
+    args = parser.parse_args()
+
+    now = time.time()
+    rng = random.Random(0)
+    history = list(random_sessions(rng, args.sessions, args.years, now))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # What a box costs the main thread: recorder + enqueue vs a synchronous commit
+        store = HistoryStore(os.path.join(tmp, "queued.sqlite"))
+        store.start()
+        recorder = SessionRecorder(store)
+
+        def box():
+            recorder.begin(1500.0, "task-1", "Project 1", 25)
+            recorder.pause()
+            recorder.resume()
+            recorder.end(1400.0, "expired")
+
+        queued = caller_us(box, args.boxes)
+        store.flush()
+        store.close()
+
+        direct_conn = connect(os.path.join(tmp, "direct.sqlite"))
+        sessions = iter(history)
+
+        def commit_one():
+            with direct_conn:
+                direct_conn.execute(INSERT_SQL, next(sessions))
+
+        direct = caller_us(commit_one, args.boxes)
+        direct_conn.close()
+
+        # Years of history through the batching writer
+        path = os.path.join(tmp, "history.sqlite")
+        store = HistoryStore(path)
+        store.start()
+        start = time.perf_counter()
+        for session in history:
+            store.add(session)
+        store.flush()
+        filled = time.perf_counter() - start
+        store.close()
+
+        conn = sqlite3.connect(path)
+        queries = {by: timed_ms(lambda by=by: calibration(conn, by, 90, now)) for by in ("project", "estimate")}
+        plan = " ".join(row[-1] for row in conn.execute(
+            "EXPLAIN QUERY PLAN " + "SELECT count(*) FROM session WHERE ended >= ?", (now - 90 * 86400,)
+        ))
+        conn.execute("DROP INDEX session_ended")
+        unindexed = {by: timed_ms(lambda by=by: calibration(conn, by, 90, now)) for by in ("project", "estimate")}
+        conn.execute("CREATE INDEX session_ended ON session(ended, task, estimate, project, actual)")
+
+        quarter = now - args.years * 365 * 86400 / 4
+        exports = {
+            name: (export_peak(conn, export, quarter), export_peak(conn, export, 0.0))
+            for name, export in (("csv", export_csv), ("json", export_json))
+        }
+        rows = calibration(conn, "estimate", 90, now)
+        conn.close()
+
+    print(f"{'':<22} {'p50':>8} {'p99':>8}   per box on the main thread")
+    print(f"{'recorder + queue':<22} {queued[0]:6.1f}us {queued[1]:6.1f}us")
+    print(f"{'commit per box':<22} {direct[0]:6.1f}us {direct[1]:6.1f}us")
+    print(f"\n{args.sessions} sessions over {args.years:g} years written in {filled:.2f} s "
+          f"({args.sessions / filled:,.0f}/s, batched)")
+    print(f"\n90-day calibration     indexed   no index   ({plan})")
+    for by in queries:
+        print(f"  by {by:<18} {queries[by]:6.2f}ms {unindexed[by]:7.2f}ms")
+    print("\nexport peak memory     quarter        all")
+    for name, ((quarter_rows, quarter_peak), (all_rows, all_peak)) in exports.items():
+        print(f"  {name:<20} {quarter_peak:6.1f}KiB {all_peak:7.1f}KiB   ({quarter_rows} / {all_rows} rows)")
+    print("\nlast 90 days by time tag:")
+    for row in rows:
+        print(f"  {row.key:>3}m  {row.tasks:5d} tasks  actual/estimate {row.ratio:.2f}")
+
+    failures = []
+    for by in queries:
+        if queries[by] >= unindexed[by]:
+            failures.append(f"calibration by {by} is no faster with the index")
+    for name, ((_, quarter_peak), (_, all_peak)) in exports.items():
+        if all_peak > quarter_peak * 1.5 + 64:
+            failures.append(f"{name} export memory grows with the history")
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
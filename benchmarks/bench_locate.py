@@ -0,0 +1,185 @@
+"""Database discovery: cached locator vs globbing per call, and several databases at once.
+
+Builds Things' container layout under a temporary HOME with --accounts
+ThingsData-* databases and a stale legacy database, then:
+
+* times the old glob-on-every-call lookup against DBLocator.paths(), which
+  only stats the containers while nothing changed
+* checks the default locator reads only the newest ThingsData-* database,
+  never the older ones or the legacy database
+* adds and removes a database and checks the locator notices each time,
+  resolving once per change
+* syncs the merged Today list of every account, including a migrated
+  duplicate, as TIMEBOX_DB would give, and checks it is the union with no
+  task twice and that the duplicate adds nothing to the plan
+* writes to each database with one observer and one handler watching them
+  all, and checks every write reaches the scheduler
+
+Exits non-zero if any check fails.
+
+    python -m benchmarks.bench_locate --accounts 3 --calls 5000
+"""
+import argparse
+import glob
+import os
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from watchdog.observers import Observer
+
+from benchmarks.thingsdb import create_database
+from timebox.locate import THINGS_DB_PATTERNS, DBLocator
+from timebox.metrics import SyncMetrics
+from timebox.query import DayLoad, TodayQuery
+from timebox.sync import IncrementalSync
+from timebox.tags import extract_minutes
+from timebox.tasks import open_today_query
+from timebox.watch import ThingsDBHandler
+
+
+class CountingScheduler:
+    def __init__(self):
+        self.notified = 0
+
+    def notify(self, force=False):
+        self.notified += 1
+
+
+def glob_every_call():
+    """The lookup before the locator: expand and glob until a pattern matches"""
+    for pattern in THINGS_DB_PATTERNS:
+        matching_paths = glob.glob(os.path.expanduser(pattern))
+        if matching_paths:
+            return matching_paths[0]
+
+
+def per_call_us(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    return statistics.median(samples)
+
+
+def account_db(index, tasks, today):
+    path = os.path.expanduser(THINGS_DB_PATTERNS[0].replace("*", f"{index:04X}"))
+    os.makedirs(os.path.dirname(path))
+    return create_database(path, tasks=tasks, today=today, seed=index)
+
+
+def newest(paths):
+    return max(paths, key=os.path.getmtime)
+
+
+def summed_plan(plans):
+    """Per-day totals of databases that share no task"""
+    loads = []
+    for day_loads in zip(*plans):
+        projects = {}
+        for load in day_loads:
+            for project, minutes in load.projects.items():
+                projects[project] = projects.get(project, 0) + minutes
+        loads.append(DayLoad(
+            day_loads[0].day, sum(load.minutes for load in day_loads), sum(load.tasks for load in day_loads), projects
+        ))
+    return loads
+
+
+def wait_for(condition, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--today", type=int, default=60)
+    parser.add_argument("--calls", type=int, default=5000)
+    args = parser.parse_args()
+
+    failures = []
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["HOME"] = tmp
+        accounts = [account_db(i, args.tasks, args.today) for i in range(args.accounts)]
+        legacy = os.path.expanduser(THINGS_DB_PATTERNS[1])
+        os.makedirs(os.path.dirname(legacy))
+        shutil.copy(accounts[0], legacy)
+
+        locator = DBLocator()
+        globbed = per_call_us(glob_every_call, args.calls)
+        cached = per_call_us(locator.paths, args.calls)
+        print(f"{'glob every call':<18} {globbed:7.1f}us")
+        print(f"{'locator, cached':<18} {cached:7.1f}us   ({locator.resolves} resolve for {args.calls} calls)")
+        if cached >= globbed:
+            failures.append("the cached locator is no faster than globbing")
+        if locator.paths() != [newest(accounts)]:
+            failures.append(f"located {locator.paths()}, expected the newest account only")
+
+        resolves = locator.resolves
+        added = account_db(args.accounts, args.tasks, args.today)
+        if locator.paths() != [added]:
+            failures.append("a new database went unnoticed")
+        shutil.rmtree(os.path.dirname(os.path.dirname(added)))
+        if locator.paths() != [newest(accounts)]:
+            failures.append("a removed database is still located")
+        locator.paths()
+        print(f"{'add + remove':<18} {locator.resolves - resolves} resolves")
+        if locator.resolves - resolves != 2:
+            failures.append(f"{locator.resolves - resolves} resolves for two container changes")
+
+        # All accounts plus the legacy copy of the first one, as TIMEBOX_DB would give
+        override = DBLocator(accounts + [legacy], merge=True)
+        query = open_today_query(override.paths())
+        start = time.perf_counter()
+        tasks, _ = IncrementalSync(query).sync()
+        merged_ms = (time.perf_counter() - start) * 1000
+        merged = [task.uuid for project in tasks.values() for task in project.values()]
+        expected = {task.uuid for path in accounts for task in TodayQuery(path, extract_minutes).fetch()}
+        print(f"{'merged Today':<18} {len(merged)} tasks from {len(override.paths())} databases "
+              f"in {merged_ms:.1f} ms")
+        if len(merged) != len(set(merged)):
+            failures.append("a task shows up twice in the merged Today list")
+        if set(merged) != expected:
+            failures.append("the merged Today list is not the union of the accounts")
+        if query.plan() != summed_plan([TodayQuery(path, extract_minutes).plan() for path in accounts]):
+            failures.append("the duplicate database changes the merged plan")
+        query.close()
+
+        observer = Observer()
+        scheduler = CountingScheduler()
+        handler = ThingsDBHandler(scheduler, SyncMetrics(enabled=False), {os.path.basename(accounts[0])})
+        for path in accounts:
+            observer.schedule(handler, os.path.dirname(path), recursive=False)
+        observer.start()
+        missed = []
+        for path in accounts:
+            before = scheduler.notified
+            writer = sqlite3.connect(path)
+            with writer:
+                writer.execute("UPDATE TMTask SET title = title || '.' WHERE rowid = 1")
+            # Like Things, the fixtures are in WAL mode: main.sqlite changes on checkpoint
+            writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            writer.close()
+            if not wait_for(lambda: scheduler.notified > before):
+                missed.append(path)
+        observer.stop()
+        observer.join()
+        print(f"{'one observer':<18} {scheduler.notified} notifications for {args.accounts} writes")
+        for path in missed:
+            failures.append(f"no notification for a write to {path}")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Logging cost on the calling thread: direct handlers vs the queue listener.
+
+Before, logging.basicConfig attached a StreamHandler and a FileHandler to the
+root logger, so every call formatted and wrote on the caller's thread (the
+AppKit main thread for clicks and ticks). Now setup_logging() only enqueues.
+stdout is pointed at a file for both runs, as it is under `brew services`.
+
+    python -m benchmarks.bench_logging --calls 5000 --gap-ms 0.2
+"""
+import argparse
+import atexit
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+from timebox.logs import FORMAT, setup_logging
+
+
+def reset_root():
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+        handler.close()
+
+
+def direct(tmp, stdout):
+    """The old setup_logging body"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format=FORMAT,
+        handlers=[logging.StreamHandler(stdout), logging.FileHandler(os.path.join(tmp, "direct.log"))],
+        force=True
+    )
+
+
+def queued(tmp, stdout):
+    real_stdout, sys.stdout = sys.stdout, stdout
+    try:
+        return setup_logging(os.path.join(tmp, "queued.log"))
+    finally:
+        sys.stdout = real_stdout
+
+
+def measure(calls, gap):
+    samples = []
+    for i in range(calls):
+        start = time.perf_counter()
+        logging.info(f"Syncing tasks... ({i} executed, 0 suppressed)")
+        samples.append((time.perf_counter() - start) * 1e6)
+        time.sleep(gap)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)], samples[-1]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=5000)
+    parser.add_argument("--gap-ms", type=float, default=0.2,
+                        help="pause between calls; the app logs a few lines per sync, not in a tight loop")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(os.path.join(tmp, "stdout"), "w") as stdout:
+        direct(tmp, stdout)
+        before = measure(args.calls, args.gap_ms / 1000)
+        reset_root()
+
+        listener = queued(tmp, stdout)
+        atexit.unregister(listener.stop)
+        after = measure(args.calls, args.gap_ms / 1000)
+        start = time.perf_counter()
+        listener.stop()
+        drained = time.perf_counter() - start
+        reset_root()
+
+    print(f"{'':<14} {'p50':>8} {'p99':>8} {'max':>9}   per logging.info on the caller")
+    for name, (p50, p99, worst) in (("direct", before), ("queue", after)):
+        print(f"{name:<14} {p50:6.1f}us {p99:6.1f}us {worst:7.1f}us")
+    print(f"\nlistener drained the backlog {drained * 1000:.1f} ms after the last call")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+"""Menu updates: keyed reconciliation vs clearing and rebuilding the menu.
+
+The second table compares the flat layout with per-project submenus: how many
+rows the first build creates, and what each sync costs when one submenu is
+opened after it. Exits non-zero if the submenu layout's first build grows
+with the number of tasks.
+
+    python -m benchmarks.bench_menu --tasks 150 --syncs 200
+"""
+import argparse
+import random
+import sys
+import time
+
+from timebox.menu import ListMenuBackend, MenuReconciler, build_menu
+from timebox.query import TodayTask
+
+
+def random_tasks(rng, count, projects):
+    tasks = {}
+    for i in range(count):
+        project = f"Project {rng.randrange(projects)}"
+        tasks.setdefault(project, {})[str(i)] = TodayTask(
+            str(i), f"Task {i}", project, rng.choice((5, 15, 30, 45, 60)), None
+        )
+    return tasks
+
+
+def edit(rng, tasks, serial):
+    """One typical Things edit: retime, rename, complete or add a task"""
+    project = rng.choice(list(tasks))
+    uuids = list(tasks[project])
+    kind = rng.randrange(4)
+    if kind == 0 and uuids:
+        uuid = rng.choice(uuids)
+        tasks[project][uuid] = tasks[project][uuid]._replace(minutes=rng.choice((5, 15, 30, 45, 60)))
+    elif kind == 1 and uuids:
+        uuid = rng.choice(uuids)
+        tasks[project][uuid] = tasks[project][uuid]._replace(title=f"{tasks[project][uuid].title}!")
+    elif kind == 2 and len(uuids) > 1:
+        del tasks[project][rng.choice(uuids)]
+    else:
+        tasks[project][f"new-{serial}"] = TodayTask(f"new-{serial}", f"New {serial}", project, 30, None)
+
+
+def on_task(sender, seconds, uuid):
+    pass
+
+
+def first_build(tasks, submenus):
+    backend = ListMenuBackend()
+    start = time.perf_counter()
+    MenuReconciler(backend).apply(build_menu(tasks, on_task, submenus=submenus))
+    return backend.inserts, time.perf_counter() - start
+
+
+def open_after_syncs(args, submenus):
+    """Edit, sync and open the edited project's submenu, as someone glancing at it would"""
+    rng = random.Random(1)
+    tasks = random_tasks(rng, args.tasks, args.projects)
+    backend = ListMenuBackend()
+    reconciler = MenuReconciler(backend)
+    reconciler.apply(build_menu(tasks, on_task, submenus=submenus))
+    start = time.perf_counter()
+    for serial in range(args.syncs):
+        edit(rng, tasks, serial)
+        reconciler.apply(build_menu(tasks, on_task, submenus=submenus))
+        if submenus:
+            backend.open(f"project:{rng.choice(list(tasks))}")
+    return backend.mutations(), time.perf_counter() - start
+
+
+def compare_layouts(args) -> bool:
+    print(f"\n{'layout':<10} {'tasks':>6} {'first build':>12}   per sync, one submenu opened")
+    grows = False
+    for submenus in (False, True):
+        name = "submenus" if submenus else "flat"
+        rows = []
+        for count in (args.tasks, args.tasks * 10):
+            rows.append(first_build(random_tasks(random.Random(0), count, args.projects), submenus))
+            inserts, elapsed = rows[-1]
+            print(f"{name:<10} {count:>6} {inserts:>7} rows {elapsed * 1e3:7.2f} ms")
+        mutations, elapsed = open_after_syncs(args, submenus)
+        print(f"{'':<10} {args.tasks:>6} {mutations / args.syncs:8.1f} mutations/sync "
+              f"{elapsed / args.syncs * 1e6:8.1f} us/sync")
+        if submenus and rows[1][0] != rows[0][0]:
+            grows = True
+    return not grows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=150)
+    parser.add_argument("--projects", type=int, default=12)
+    parser.add_argument("--syncs", type=int, default=200)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    tasks = random_tasks(rng, args.tasks, args.projects)
+
+    reconciled = ListMenuBackend()
+    reconciler = MenuReconciler(reconciled)
+    reconciler.apply(build_menu(tasks, on_task))
+    rebuilt = ListMenuBackend()
+
+    reconcile_time = rebuild_time = 0.0
+    for serial in range(args.syncs):
+        edit(rng, tasks, serial)
+        desired = build_menu(tasks, on_task)
+
+        start = time.perf_counter()
+        reconciler.apply(desired)
+        reconcile_time += time.perf_counter() - start
+
+        start = time.perf_counter()
+        for index in range(len(rebuilt.entries) - 1, -1, -1):
+            rebuilt.remove(index, rebuilt.entries[index].key)
+        for index, entry in enumerate(desired):
+            rebuilt.insert(index, entry)
+        rebuild_time += time.perf_counter() - start
+
+        assert reconciled.entries == rebuilt.entries
+
+    print(f"{args.tasks} tasks, {args.syncs} syncs with one edit each\n")
+    for name, backend, elapsed in (("reconcile", reconciled, reconcile_time),
+                                   ("rebuild", rebuilt, rebuild_time)):
+        mutations = backend.mutations()
+        print(f"{name:<10} {mutations / args.syncs:8.1f} mutations/sync   "
+              f"(+{backend.inserts} -{backend.removes} ~{backend.updates})   "
+              f"{elapsed / args.syncs * 1e6:8.1f} us/sync")
+
+    if not compare_layouts(args):
+        print("submenu layout: first build grew with the task count")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Sync instrumentation: overhead with metrics off and on, and a sample export.
+
+Runs the worker half of a sync (gate, incremental read, menu build) plus the
+menu apply against a synthetic database, once with a disabled SyncMetrics and
+once with an enabled one, and prints the Prometheus file the enabled run
+would write.
+
+    python -m benchmarks.bench_metrics --tasks 20000 --syncs 200
+"""
+import argparse
+import logging
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.menu import ListMenuBackend, MenuReconciler, build_menu
+from timebox.metrics import SyncMetrics
+from timebox.query import TodayQuery
+from timebox.sync import IncrementalSync, SyncGate
+from timebox.tags import extract_minutes
+
+
+def on_task(sender, seconds, url):
+    pass
+
+
+def run(db_path, metrics, syncs):
+    """Median ms per sync, editing one Today task before each"""
+    query = TodayQuery(db_path, metrics.timed("tag_parse", extract_minutes))
+    task_sync, gate = IncrementalSync(query), SyncGate(query)
+    menu = MenuReconciler(ListMenuBackend())
+    writer = sqlite3.connect(db_path)
+    uuids = [task.uuid for task in query.fetch()]
+    samples = []
+    for i in range(syncs):
+        writer.execute(
+            "UPDATE TMTask SET title = ?, userModificationDate = ? WHERE uuid = ?",
+            (f"Edit {i}", time.time(), uuids[i % len(uuids)])
+        )
+        writer.commit()
+        start = time.perf_counter()
+        trace = metrics.trace()
+        with trace.phase("gate"):
+            gate.should_sync()
+        with trace.phase("db_read"):
+            tasks, _ = task_sync.sync()
+        with trace.phase("menu_build"):
+            entries = build_menu(tasks, on_task)
+        with trace.phase("menu_apply"):
+            mutations = menu.apply(entries)
+        trace.finish("synced", mutations=mutations)
+        samples.append((time.perf_counter() - start) * 1000)
+    writer.close()
+    query.close()
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--syncs", type=int, default=200)
+    args = parser.parse_args()
+
+    # JSON lines go through logging like in the app, just not to the terminal
+    logging.getLogger("timebox.metrics").addHandler(logging.NullHandler())
+    logging.getLogger("timebox.metrics").propagate = False
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"), tasks=args.tasks)
+        run(db_path, SyncMetrics(), 10)  # warm the page cache
+        off = run(db_path, SyncMetrics(), args.syncs)
+        metrics = SyncMetrics(os.path.join(tmp, "timebox.prom"))
+        on = run(db_path, metrics, args.syncs)
+        metrics.write()
+        with open(metrics.path) as f:
+            export = f.read()
+
+    print(f"metrics off  {off:7.3f} ms/sync")
+    print(f"metrics on   {on:7.3f} ms/sync  ({(on - off) * 1000:+.0f} us)\n")
+    print("\n".join(line for line in export.splitlines() if 'le="' not in line))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""Planning view: per-day totals summed in SQLite vs rows summed in Python.
+
+The fixture has years of scheduled and repeating to-dos on top of the usual
+library. Both sides read the same candidates; the Python side pulls one row per
+task and time tag and does the first-tag collapse and the per-day/per-project
+sums itself, the way the totals used to be computed from the task map. The
+results must match.
+
+    python -m benchmarks.bench_plan --tasks 100000 --upcoming 20000 --repeating 500
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from datetime import date, timedelta
+
+from benchmarks.thingsdb import create_database
+from timebox.query import (
+    CONTEXT_JOINS, PLAN_SQL, PLAN_WHERE, TIME_TAG_CTE, TODAY_WINDOW, DayLoad, TodayQuery,
+    from_things_date, things_date,
+)
+from timebox.tags import extract_minutes
+
+ROWS_SQL = f"""
+    WITH {TIME_TAG_CTE}
+    SELECT
+        TASK.uuid,
+        CASE WHEN {TODAY_WINDOW} THEN :today ELSE TASK.startDate END,
+        COALESCE(PROJECT.title, PROJECT_OF_HEADING.title, 'No Project'),
+        TIME_TAG.minutes
+    FROM TMTask AS TASK
+    CROSS JOIN TMTaskTag AS TAGS ON TAGS.tasks = TASK.uuid
+    CROSS JOIN TIME_TAG ON TIME_TAG.uuid = TAGS.tags
+    {CONTEXT_JOINS}
+    WHERE {PLAN_WHERE}
+    ORDER BY TASK.todayIndex, TIME_TAG."index"
+"""
+
+
+def python_plan(query, days):
+    today = date.today()
+    params = {"today": things_date(today), "horizon": things_date(today + timedelta(days))}
+    loads = {today + timedelta(offset): (0, 0, {}) for offset in range(days + 1)}
+    seen = set()
+    for uuid, day, project, minutes in query.execute(ROWS_SQL, params):
+        if uuid in seen:
+            continue
+        seen.add(uuid)
+        total, count, projects = loads[from_things_date(day)]
+        projects[project] = projects.get(project, 0) + minutes
+        loads[from_things_date(day)] = (total + minutes, count + 1, projects)
+    return [DayLoad(day, *load) for day, load in loads.items()]
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--upcoming", type=int, default=20000)
+    parser.add_argument("--repeating", type=int, default=500)
+    parser.add_argument("--days", type=int, default=7)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(
+            os.path.join(tmp, "main.sqlite"), tasks=args.tasks, upcoming=args.upcoming,
+            repeating=args.repeating
+        )
+        query = TodayQuery(db_path, extract_minutes)
+        print(f"{args.tasks} tasks, {args.upcoming} scheduled over two years, "
+              f"{args.repeating} repeating, {args.days} days ahead\n")
+
+        sql, sql_ms = median_ms(lambda: query.plan(args.days), args.repeat)
+        py, py_ms = median_ms(lambda: python_plan(query, args.days), args.repeat)
+        # Python dicts keep insertion order, SQL orders projects by first Today position
+        if [(d.day, d.minutes, d.tasks, sorted(d.projects.items())) for d in sql] != \
+                [(d.day, d.minutes, d.tasks, sorted(d.projects.items())) for d in py]:
+            raise SystemExit("SQL and Python totals differ")
+        today = date.today()
+        params = {"today": things_date(today), "horizon": things_date(today + timedelta(args.days))}
+        sql_rows = len(query.execute(PLAN_SQL, params))
+        py_rows = len(query.execute(ROWS_SQL, params))
+        print(f"plan, SQL aggregation     {sql_ms:8.2f} ms  {sql_rows:6} rows into Python")
+        print(f"plan, Python aggregation  {py_ms:8.2f} ms  {py_rows:6} rows into Python")
+        query.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""Today query: TodayQuery vs the things.py path get_todays_tasks() used to take.
+
+    python -m benchmarks.bench_query --tasks 50000 --today 150
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.query import TodayQuery
+from timebox.tags import extract_minutes
+
+
+def things_py_today(db_path):
+    """The pre-TodayQuery implementation of get_todays_tasks(), minus error handling"""
+    import things
+
+    processed_tasks = {}
+    for task in things.today(filepath=db_path):
+        if 'tags' in task:
+            time_tags = []
+            for tag in task['tags']:
+                if minutes := extract_minutes(tag):
+                    time_tags.append((tag, minutes))
+            if time_tags:
+                _, minutes = time_tags[0]
+                project_name = task.get('project_title', 'No Project')
+                processed_tasks.setdefault(project_name, {})[task['title']] = (
+                    minutes, f"things:///show?id={task['uuid']}"
+                )
+    return processed_tasks
+
+
+def today_query(query):
+    processed_tasks = {}
+    for task in query.fetch():
+        processed_tasks.setdefault(task.project, {})[task.title] = (
+            task.minutes, f"things:///show?id={task.uuid}"
+        )
+    return processed_tasks
+
+
+def flatten(processed_tasks):
+    return sorted(
+        (title, minutes, url)
+        for project_tasks in processed_tasks.values()
+        for title, (minutes, url) in project_tasks.items()
+    )
+
+
+def measure(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return result, samples
+
+
+def report(name, samples):
+    print(f"{name:<12} median {statistics.median(samples):8.2f} ms   "
+          f"min {min(samples):8.2f} ms   max {max(samples):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"),
+                                  tasks=args.tasks, today=args.today)
+        print(f"{args.tasks} tasks, {args.today} in Today, {args.repeat} runs each\n")
+
+        query = TodayQuery(db_path, extract_minutes)
+        new, new_samples = measure(lambda: today_query(query), args.repeat)
+        query.close()
+        report("TodayQuery", new_samples)
+
+        try:
+            import things  # noqa: F401
+        except ImportError:
+            print("things.py not installed, skipping comparison")
+            return
+
+        old, old_samples = measure(lambda: things_py_today(db_path), args.repeat)
+        report("things.py", old_samples)
+        print(f"\nspeedup x{statistics.median(old_samples) / statistics.median(new_samples):.1f}")
+        # things.py leaves project_title unset for tasks under a heading, where
+        # TodayQuery resolves the heading's project, so compare the tasks only
+        if flatten(old) != flatten(new):
+            raise SystemExit("results differ between implementations")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Time to first menu at launch: live reads vs the on-disk snapshot.
+
+Each launch gets a fresh TodayQuery (new connection, empty caches) and ends
+when the menu has been applied to the in-memory ListMenuBackend:
+
+  two queries   the old startup, a read for the terminal summary and then the
+                initial sync
+  one query     the initial sync alone
+  snapshot      load + restore the snapshot, no database access; the
+                revalidation that follows on the sync worker is timed apart
+
+    python -m benchmarks.bench_snapshot --tasks 100000 --today 300
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.menu import ListMenuBackend, MenuReconciler, build_menu
+from timebox.query import TodayQuery
+from timebox.snapshot import Snapshot, load_snapshot, save_snapshot
+from timebox.sync import IncrementalSync, SyncGate, build_task_map
+from timebox.tags import extract_minutes
+
+
+def on_task(sender, seconds, url):
+    pass
+
+
+def launch(db_path, snapshot_path=None, summary_read=False):
+    """Seconds until the first menu is applied, plus the background revalidation"""
+    start = time.perf_counter()
+    query = TodayQuery(db_path, extract_minutes)
+    task_sync, gate = IncrementalSync(query), SyncGate(query)
+    menu = MenuReconciler(ListMenuBackend())
+    menu.apply(build_menu({}, on_task))
+
+    snapshot = load_snapshot(snapshot_path) if snapshot_path else None
+    if snapshot is not None:
+        snapshot.restore(task_sync)
+        menu.apply(build_menu(task_sync.task_map(), on_task))
+        first_menu = time.perf_counter() - start
+        start = time.perf_counter()
+        if gate.should_sync():
+            tasks, _ = task_sync.sync()
+            menu.apply(build_menu(tasks, on_task))
+        revalidate = time.perf_counter() - start
+    else:
+        if summary_read:
+            build_task_map(query.fetch())
+        gate.should_sync()
+        tasks, _ = task_sync.sync()
+        menu.apply(build_menu(tasks, on_task))
+        first_menu, revalidate = time.perf_counter() - start, 0.0
+
+    query.close()
+    return first_menu * 1000, revalidate * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=100000)
+    parser.add_argument("--today", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"), tasks=args.tasks, today=args.today)
+        snapshot_path = os.path.join(tmp, "cache", "today.json")
+
+        query = TodayQuery(db_path, extract_minutes)
+        task_sync = IncrementalSync(query)
+        task_sync.sync()
+        save_snapshot(snapshot_path, Snapshot.capture(task_sync))
+        query.close()
+        print(f"snapshot: {len(task_sync.tasks)} tasks, {os.path.getsize(snapshot_path)} bytes\n")
+
+        launch(db_path)  # warm the page cache
+        for name, kwargs in (
+            ("two queries", {"summary_read": True}),
+            ("one query", {}),
+            ("snapshot", {"snapshot_path": snapshot_path}),
+        ):
+            runs = [launch(db_path, **kwargs) for _ in range(args.repeat)]
+            first_menu = statistics.median(run[0] for run in runs)
+            revalidate = statistics.median(run[1] for run in runs)
+            line = f"{name:<12} first menu {first_menu:8.2f} ms"
+            if revalidate:
+                line += f"   revalidate in background {revalidate:7.2f} ms"
+            print(line)
+
+
+if __name__ == "__main__":
+    main()
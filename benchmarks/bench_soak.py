@@ -0,0 +1,204 @@
+"""Soak: memory across many syncs of a long-running app.
+
+Runs the sync -> task map -> menu build -> reconcile loop against a fixture
+database and an in-memory backend, renaming, retiming, completing and
+reopening Today tasks between syncs the way weeks of use would. The backend
+shares the app's ItemMenuBackend bookkeeping and release path, with items that
+register themselves in a model of rumps' process-wide callback registry.
+tracemalloc compares what is still allocated after a warm-up with what is
+allocated at the end; anything the loop keeps reachable shows up as growth.
+Exits non-zero (listing the biggest growers) if it exceeds --max-growth-kib,
+if max RSS grows by more than --max-rss-growth-kib, or if the registry holds
+rows that are no longer in any menu.
+
+    python -m benchmarks.bench_soak --syncs 10000
+    python -m benchmarks.bench_soak --syncs 10000 --submenus
+"""
+import argparse
+import gc
+import json
+import os
+import resource
+import sqlite3
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.thingsdb import TIME_TAGS, create_database
+from timebox.menu import ItemMenuBackend, LazySubmenu, MenuReconciler, build_menu
+from timebox.query import TodayQuery
+from timebox.sync import IncrementalSync
+from timebox.tags import extract_minutes
+
+
+def on_task(sender, seconds, uuid):
+    pass
+
+
+class RegistryItem:
+    """Stands in for rumps.MenuItem: set_callback() registers it, as rumps does in
+    NSApp._ns_to_py_and_callback, and nothing but unregister() drops it"""
+
+    registry = {}
+
+    def __init__(self, title=None):
+        self.title = title
+
+    def set_callback(self, callback):
+        self.registry[self] = callback
+
+
+class RegistryMenuBackend(ItemMenuBackend):
+    """The app's item bookkeeping and release path over RegistryItems instead of AppKit"""
+
+    def new_item(self, entry):
+        return RegistryItem(entry.title)
+
+    def attach(self, index, item):
+        pass
+
+    def detach(self, item):
+        pass
+
+    def new_submenu(self, item):
+        return LazySubmenu(RegistryMenuBackend()), None
+
+    def unregister(self, item):
+        RegistryItem.registry.pop(item, None)
+
+    def open(self, key) -> int:
+        """Open a submenu the way AppKit would; returns the mutations filling it took"""
+        item = next(item for item in self.items if id(item) in self.entries and self.entries[id(item)].key == key)
+        return self.submenus[id(item)][0].will_open()
+
+    def live_rows(self) -> int:
+        """Rows still in this menu or any filled submenu that hold a registry entry"""
+        return len(self.entries) + sum(
+            submenu.reconciler.backend.live_rows() for submenu, _ in self.submenus.values()
+        )
+
+
+class Soak:
+    def __init__(self, db_path, submenus):
+        self.writer = sqlite3.connect(db_path)
+        self.task_sync = IncrementalSync(TodayQuery(db_path, extract_minutes))
+        self.backend = RegistryMenuBackend()
+        self.menu = MenuReconciler(self.backend)
+        self.submenus = submenus
+        self.uuids = [task.uuid for task in self.task_sync.query.fetch()]
+        self.time_tags = [uuid for uuid, title in self.writer.execute("SELECT uuid, title FROM TMTag")
+                          if title in TIME_TAGS]
+        self.time_tags_json = json.dumps(self.time_tags)
+        self.completed = None
+        self.serial = 0
+        self.mutations = 0
+
+    def edit(self):
+        """Rename, retime, or complete/reopen a Today task"""
+        self.serial += 1
+        uuid = self.uuids[self.serial % len(self.uuids)]
+        kind = self.serial % 4
+        if kind == 0:
+            self.writer.execute("UPDATE TMTask SET title = ? WHERE uuid = ?",
+                                (f"Renamed {self.serial}", uuid))
+        elif kind == 1:
+            self.writer.execute(
+                "DELETE FROM TMTaskTag WHERE tasks = ? AND tags IN (SELECT value FROM json_each(?))",
+                (uuid, self.time_tags_json)
+            )
+            self.writer.execute("INSERT INTO TMTaskTag VALUES (?, ?)",
+                                (uuid, self.time_tags[self.serial % len(self.time_tags)]))
+        elif self.completed is None:
+            self.writer.execute("UPDATE TMTask SET status = 3 WHERE uuid = ?", (uuid,))
+            self.completed = uuid
+        else:
+            self.writer.execute("UPDATE TMTask SET status = 0 WHERE uuid = ?", (self.completed,))
+            self.completed = None
+        self.writer.execute("UPDATE TMTask SET userModificationDate = ? WHERE uuid = ?",
+                            (time.time() + self.serial, uuid))
+        self.writer.commit()
+
+    def sync(self):
+        tasks, _ = self.task_sync.sync()
+        self.mutations += self.menu.apply(build_menu(tasks, on_task, submenus=self.submenus))
+        if self.submenus and tasks:
+            projects = list(tasks)
+            self.mutations += self.backend.open(f"project:{projects[self.serial % len(projects)]}")
+
+    def close(self):
+        self.task_sync.query.close()
+        self.writer.close()
+
+
+def max_rss_kib() -> float:
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / 1024 if sys.platform == "darwin" else rss
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--syncs", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=500)
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--submenus", action="store_true")
+    parser.add_argument("--max-growth-kib", type=float, default=64)
+    parser.add_argument("--max-rss-growth-kib", type=float, default=2048)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db = os.path.join(tmp, "main.sqlite")
+        create_database(db, tasks=args.tasks, today=args.today)
+        soak = Soak(db, args.submenus)
+
+        tracemalloc.start()
+        for _ in range(args.warmup):
+            soak.edit()
+            soak.sync()
+        gc.collect()
+        before = tracemalloc.take_snapshot()
+        traced_before, _ = tracemalloc.get_traced_memory()
+        rss_before = max_rss_kib()
+
+        start = time.perf_counter()
+        for _ in range(args.syncs):
+            soak.edit()
+            soak.sync()
+        elapsed = time.perf_counter() - start
+
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        traced_after, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        rss_after = max_rss_kib()
+        mutations = soak.mutations
+        registered, live = len(RegistryItem.registry), soak.backend.live_rows()
+        soak.close()
+
+    growth = (traced_after - traced_before) / 1024
+    print(f"{args.syncs} syncs after {args.warmup} warm-up, "
+          f"{'submenus' if args.submenus else 'flat'} menu, {mutations} menu mutations, "
+          f"{elapsed / args.syncs * 1000:.2f} ms/sync under tracemalloc\n")
+    print(f"traced   {traced_before / 1024:9.1f} KiB -> {traced_after / 1024:9.1f} KiB "
+          f"({growth:+.1f} KiB, peak {peak / 1024:.1f} KiB)")
+    print(f"max RSS  {rss_before:9.0f} KiB -> {rss_after:9.0f} KiB ({rss_after - rss_before:+.0f} KiB)")
+    print(f"registry {registered:9d} items for {live} rows in the menus")
+
+    if registered != live:
+        print(f"\n{registered - live} removed rows are still registered")
+        sys.exit(1)
+
+    if growth > args.max_growth_kib:
+        print(f"\ngrew more than {args.max_growth_kib} KiB; biggest growers:")
+        for stat in after.compare_to(before, "lineno")[:10]:
+            print(f"  {stat}")
+        sys.exit(1)
+
+    if rss_after - rss_before > args.max_rss_growth_kib:
+        print(f"\nmax RSS grew more than {args.max_rss_growth_kib} KiB")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""CLI startup: cold import cost of the query-only path.
+
+Runs `python -X importtime` in fresh interpreters, reports the cumulative
+import time of timebox.cli and the slowest modules it pulls in, and the wall
+time of `timebox total --json` against a synthetic database. Exits non-zero if
+the menu bar dependencies leak into the query path or a budget is exceeded.
+
+    python -m benchmarks.bench_startup --max-import-ms 40
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+
+FORBIDDEN = ("rumps", "watchdog", "things", "AppKit", "objc")
+
+
+def import_times(module):
+    """Map module -> cumulative import time in microseconds, from -X importtime"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        if cumulative.strip().isdigit():
+            times[name.strip()] = int(cumulative)
+    return times
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=10)
+    parser.add_argument("--max-import-ms", type=float, default=None)
+    parser.add_argument("--max-run-ms", type=float, default=None)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.repeat):
+        times = import_times("timebox.cli")
+        samples.append(times["timebox.cli"] / 1000)
+    import_ms = statistics.median(samples)
+    print(f"import timebox.cli   median {import_ms:6.1f} ms cumulative\n")
+    for name, cumulative in sorted(times.items(), key=lambda item: -item[1])[:8]:
+        print(f"    {cumulative / 1000:6.1f} ms  {name}")
+
+    leaked = sorted(name for name in times if name.split(".")[0] in FORBIDDEN)
+    if leaked:
+        raise SystemExit(f"query path imports {', '.join(leaked)}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"), tasks=5000)
+        runs = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            subprocess.run(
+                [sys.executable, "-m", "timebox.cli", "--db", db_path, "total", "--json"],
+                check=True, capture_output=True
+            )
+            runs.append((time.perf_counter() - start) * 1000)
+    run_ms = statistics.median(runs)
+    print(f"\ntimebox total --json median {run_ms:6.1f} ms wall (incl. interpreter start)")
+
+    if args.max_import_ms is not None and import_ms > args.max_import_ms:
+        raise SystemExit(f"import took {import_ms:.1f} ms, budget {args.max_import_ms} ms")
+    if args.max_run_ms is not None and run_ms > args.max_run_ms:
+        raise SystemExit(f"run took {run_ms:.1f} ms, budget {args.max_run_ms} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""Event storms: the watcher -> scheduler -> sync -> menu pipeline under load.
+
+A bulk import or a cloud-sync catch-up makes watchdog deliver hundreds of
+modified events a second. Things runs in WAL mode, so every commit lands in
+main.sqlite-wal; -shm changes on reads too and main.sqlite only on
+checkpoints. This replays such streams into the real ThingsDBHandler, watching
+the names the app watches, and SyncScheduler, with a fake database whose
+version moves with every -wal event and a fake menu that records which version
+it shows.
+
+Two passes per stream:
+
+* clock: on a ManualClock, with each sync taking --sync-ms of fake time. Reports
+  syncs per database event and per second, write -> menu lag, the lag after
+  each burst's last write (settle), and writes the menu never showed (lost).
+* threads: the same stream fired from --feeders threads at the real worker
+  thread, with its timestamps and the debounce windows scaled down by
+  --scale. Reports overlapping syncs, extra threads and lost updates.
+
+Streams are synthetic (import, catch-up, trickle) or recorded with
+--replay FILE: one event per line, `seconds [path]` (default: a -wal
+commit), e.g. timestamps from `watchmedo log`. Exits non-zero when a threshold is crossed, so coalescing or
+threading changes can't make any of this worse unnoticed.
+
+    python -m benchmarks.bench_storm
+    python -m benchmarks.bench_storm --replay events.txt
+"""
+import argparse
+import collections
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+from watchdog.events import FileModifiedEvent
+
+from timebox.metrics import SyncMetrics
+from timebox.scheduler import ManualClock, MainThreadQueue, SyncScheduler
+from timebox.watch import ThingsDBHandler
+
+DB = "/Things/main.sqlite"
+WAL = DB + "-wal"
+SHM = DB + "-shm"
+WATCHED = [os.path.basename(DB), os.path.basename(WAL)]
+STEP = 0.005
+
+
+def is_write(path):
+    return os.path.basename(path) == os.path.basename(WAL)
+
+
+def burst(rng, start, count, rate):
+    """`count` commits at about `rate` a second, each with -shm noise and now
+    and then a checkpoint, which touches main.sqlite without a new commit"""
+    events, now = [], start
+    for _ in range(count):
+        now += rng.expovariate(rate)
+        events.append((now, WAL))
+        events.append((now + rng.uniform(0, 0.002), SHM))
+        if rng.random() < 0.02:
+            events.append((now + rng.uniform(0, 0.002), DB))
+    return events
+
+
+def storms(rng):
+    """name -> [(seconds, path)] sorted by time"""
+    catch_up, now = [], 0.0
+    for _ in range(20):
+        catch_up += burst(rng, now, rng.randrange(50, 300), rng.uniform(100, 400))
+        now = catch_up[-1][0] + rng.uniform(0.2, 2.0)
+    return {
+        "import": sorted(burst(rng, 0.0, 2000, 400)),
+        "catch-up": sorted(catch_up),
+        "trickle": sorted(burst(rng, 0.0, 120, 2)),
+    }
+
+
+def load_replay(path):
+    events = []
+    with open(path) as f:
+        for line in f:
+            fields = line.split(maxsplit=1)
+            if fields:
+                events.append((float(fields[0]), fields[1].strip() if len(fields) > 1 else WAL))
+    start = min(seconds for seconds, _ in events)
+    return sorted((seconds - start, path) for seconds, path in events)
+
+
+def split_bursts(events, quiet=1.0):
+    """Indices of the last database write before each quiet gap"""
+    writes = [i for i, (_, path) in enumerate(events) if is_write(path)]
+    return [i for i, j in zip(writes, writes[1:] + [None])
+            if j is None or events[j][0] - events[i][0] > quiet]
+
+
+class FakeThings:
+    """Database stand-in: every write bumps the version, a sync reads it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.version = 0
+
+    def write(self) -> int:
+        with self.lock:
+            self.version += 1
+            return self.version
+
+    def read(self) -> int:
+        with self.lock:
+            return self.version
+
+
+class FakeMenu:
+    """Records when each write first became visible"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.version = 0
+        self.unseen = collections.deque()  # (version, written at)
+        self.lags = []
+
+    def written(self, version):
+        self.unseen.append((version, self.clock()))
+
+    def apply(self, version):
+        now = self.clock()
+        self.version = max(self.version, version)
+        while self.unseen and self.unseen[0][0] <= self.version:
+            self.lags.append(now - self.unseen.popleft()[1])
+
+
+def percentile(samples, q):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * q))] if samples else 0.0
+
+
+def replay_clock(events, delay, max_wait, sync_cost):
+    clock = ManualClock()
+    db, menu, ui = FakeThings(), FakeMenu(clock), MainThreadQueue()
+    in_flight = []  # (ready at, version read)
+
+    def work(force):
+        in_flight.append((clock() + sync_cost, db.read()))
+
+    scheduler = SyncScheduler(work, delay=delay, max_wait=max_wait, clock=clock)
+    handler = ThingsDBHandler(scheduler, SyncMetrics(), WATCHED)
+
+    def step():
+        for ready in [item for item in in_flight if item[0] <= clock()]:
+            in_flight.remove(ready)
+            ui.put(menu.apply, ready[1])
+        ui.drain()
+        # One worker: the next sync starts only once the last one finished
+        if not in_flight:
+            scheduler.run_due()
+
+    last_writes, burst_ends = set(split_bursts(events)), []
+    for index, (seconds, path) in enumerate(events):
+        while clock() + STEP <= seconds:
+            clock.advance(STEP)
+            step()
+        clock.advance(seconds - clock())
+        step()
+        if is_write(path):
+            menu.written(db.write())
+        handler.on_modified(FileModifiedEvent(path))
+        if index in last_writes:
+            burst_ends.append(db.version)
+    while scheduler.due_in() is not None or in_flight:
+        clock.advance(STEP)
+        step()
+
+    writes = db.version
+    # Lags are in write order, so a burst's settle time is its last write's lag
+    settled = [menu.lags[version - 1] for version in burst_ends if version <= len(menu.lags)]
+    return {
+        "writes": writes,
+        "syncs": scheduler.runs,
+        "per_event": scheduler.runs / writes,
+        "per_second": scheduler.runs / max(events[-1][0], 1.0),
+        "lag_p50": statistics.median(menu.lags),
+        "lag_p99": percentile(menu.lags, 0.99),
+        "settle_max": max(settled, default=0.0),
+        "lost": writes - menu.version,
+    }
+
+
+def replay_threads(events, delay, max_wait, sync_cost, feeders, scale):
+    db, menu, ui = FakeThings(), FakeMenu(time.monotonic), MainThreadQueue()
+    running = [0]
+    overlaps = [0]
+    lock = threading.Lock()
+
+    def work(force):
+        with lock:
+            running[0] += 1
+            overlaps[0] += running[0] > 1
+        try:
+            version = db.read()
+            time.sleep(sync_cost)
+            ui.put(menu.apply, version)
+        finally:
+            with lock:
+                running[0] -= 1
+
+    baseline = threading.active_count()
+    scheduler = SyncScheduler(work, delay=delay, max_wait=max_wait)
+    handler = ThingsDBHandler(scheduler, SyncMetrics(), WATCHED)
+    scheduler.start()
+
+    def feed(share, start):
+        for seconds, path in share:
+            wait = start + seconds * scale - time.monotonic()
+            if wait > 0:
+                time.sleep(wait)
+            if is_write(path):
+                db.write()
+            handler.on_modified(FileModifiedEvent(path))
+
+    start = time.monotonic()
+    threads = [threading.Thread(target=feed, args=(events[i::feeders], start)) for i in range(feeders)]
+    for thread in threads:
+        thread.start()
+    peak = 0
+    deadline = None
+    while True:
+        ui.drain()
+        feeding = sum(thread.is_alive() for thread in threads)
+        peak = max(peak, threading.active_count() - baseline - feeding)
+        if deadline is None and not feeding:
+            deadline = time.monotonic() + max_wait + delay + sync_cost * 4 + 0.5
+        if deadline is not None and (menu.version == db.version or time.monotonic() > deadline):
+            break
+        time.sleep(0.001)
+    scheduler.stop()
+    ui.drain()
+
+    return {
+        "syncs": scheduler.runs,
+        "per_event": scheduler.runs / db.version,
+        "overlaps": overlaps[0],
+        "threads": peak,
+        "lost": db.version - menu.version,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--replay", help="recorded events, `seconds [path]` per line")
+    parser.add_argument("--delay", type=float, default=0.5, help="scheduler debounce, as in the app")
+    parser.add_argument("--max-wait", type=float, default=3.0)
+    parser.add_argument("--sync-ms", type=float, default=40, help="fake duration of one sync")
+    parser.add_argument("--feeders", type=int, default=4)
+    parser.add_argument("--scale", type=float, default=0.05,
+                        help="time scale of the threaded pass's debounce windows")
+    parser.add_argument("--max-syncs-per-event", type=float, default=0.05,
+                        help="for streams denser than 20 writes a second")
+    parser.add_argument("--max-settle", type=float, default=None,
+                        help="seconds from a burst's last write to the menu showing it "
+                             "(default: delay + 2 syncs + 50 ms)")
+    args = parser.parse_args()
+
+    sync_cost = args.sync_ms / 1000
+    max_settle = args.max_settle or args.delay + 2 * sync_cost + 0.05
+    streams = {"replay": load_replay(args.replay)} if args.replay else storms(random.Random(0))
+
+    failures = []
+    print(f"{'clock':<10} {'writes':>6} {'syncs':>6} {'per event':>9} {'per s':>6} {'lag p50':>8} "
+          f"{'lag p99':>8} {'settle':>7} {'lost':>5}")
+    for name, events in streams.items():
+        r = replay_clock(events, args.delay, args.max_wait, sync_cost)
+        print(f"{name:<10} {r['writes']:6d} {r['syncs']:6d} {r['per_event']:9.3f} {r['per_second']:6.2f} "
+              f"{r['lag_p50']:7.2f}s {r['lag_p99']:7.2f}s {r['settle_max']:6.2f}s {r['lost']:5d}")
+        dense = r["writes"] / max(events[-1][0], 1.0) > 20
+        if dense and r["per_event"] > args.max_syncs_per_event:
+            failures.append(f"{name}: {r['per_event']:.3f} syncs per event")
+        # Trailing-edge debouncing never syncs more than once per debounce window
+        if r["per_second"] > 1 / args.delay:
+            failures.append(f"{name}: {r['per_second']:.2f} syncs a second")
+        if r["settle_max"] > max_settle:
+            failures.append(f"{name}: menu settled {r['settle_max']:.2f}s after the last write")
+        if r["lost"]:
+            failures.append(f"{name}: {r['lost']} lost updates on the clock")
+
+    print(f"\n{'threads':<10} {'syncs':>6} {'per event':>9} {'overlaps':>8} {'threads':>7} {'lost':>5}"
+          f"   {args.feeders} feeders, windows x{args.scale}")
+    for name, events in streams.items():
+        r = replay_threads(events, args.delay * args.scale, args.max_wait * args.scale,
+                           sync_cost * args.scale, args.feeders, args.scale)
+        print(f"{name:<10} {r['syncs']:6d} {r['per_event']:9.3f} {r['overlaps']:8d} "
+              f"{r['threads']:7d} {r['lost']:5d}")
+        if r["overlaps"]:
+            failures.append(f"{name}: {r['overlaps']} overlapping syncs")
+        if r["threads"] > 1:
+            failures.append(f"{name}: {r['threads']} extra threads, expected the one sync worker")
+        if r["lost"]:
+            failures.append(f"{name}: {r['lost']} lost updates with threads")
+
+    if failures:
+        print("\n" + "\n".join(failures))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Incremental sync: cost of a sync after a single-task edit vs a bare full fetch.
+
+A sync is one fetch plus a diff in Python, so it should cost about the same
+as the fetch and build_task_map it replaces. Exits non-zero if it costs more
+than --max-overhead times as much, or if its result differs.
+
+    python -m benchmarks.bench_sync --tasks 50000 --today 300
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.query import TodayQuery
+from timebox.sync import IncrementalSync, build_task_map
+from timebox.tags import extract_minutes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=50000)
+    parser.add_argument("--today", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--max-overhead", type=float, default=1.2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"),
+                                  tasks=args.tasks, today=args.today)
+        writer = sqlite3.connect(db_path)
+        today_uuids = [row[0] for row in writer.execute(
+            "SELECT uuid FROM TMTask WHERE todayIndex > 0 OR startDate IS NOT NULL"
+        )]
+        query = TodayQuery(db_path, extract_minutes)
+        task_sync = IncrementalSync(query)
+        task_sync.sync()
+
+        full, incremental = [], []
+        for i in range(args.repeat):
+            uuid = today_uuids[i % len(today_uuids)]
+            writer.execute(
+                "UPDATE TMTask SET title = ?, userModificationDate = ? WHERE uuid = ?",
+                (f"Edited {i}", time.time(), uuid)
+            )
+            writer.commit()
+
+            start = time.perf_counter()
+            tasks, changes = task_sync.sync()
+            incremental.append((time.perf_counter() - start) * 1000)
+
+            start = time.perf_counter()
+            expected = build_task_map(query.fetch())
+            full.append((time.perf_counter() - start) * 1000)
+
+            if tasks != expected:
+                raise SystemExit("incremental result differs from full fetch")
+
+        print(f"{args.tasks} tasks, {args.today} in Today, one edit per sync\n")
+        print(f"full fetch    median {statistics.median(full):8.2f} ms")
+        print(f"incremental   median {statistics.median(incremental):8.2f} ms")
+        query.close()
+        writer.close()
+
+    if statistics.median(incremental) > statistics.median(full) * args.max_overhead:
+        print(f"\na sync costs more than {args.max_overhead:g}x a full fetch")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
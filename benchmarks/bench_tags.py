@@ -0,0 +1,106 @@
+"""Time tag parsing: the old character scan vs the cached parser, plus a property corpus.
+
+The corpus runs first and exits non-zero on any counterexample; it generates
+every supported spelling from random durations and checks the parser inverts
+it, that it agrees with the old parser on the spellings both accept, and that
+malformed tags are rejected.
+
+    python -m benchmarks.bench_tags --cases 20000
+"""
+import argparse
+import random
+import timeit
+
+from timebox.tags import extract_minutes, first_durations
+
+OTHER_TAGS = ["Errand", "Home", "Work", "Waiting", "Important", "Low Energy", "m", "h", ":"]
+
+
+def legacy_extract_minutes(tag):
+    """extract_minutes as it was before the parser rewrite"""
+    tag = tag.lower().replace(' ', '')
+    if tag.endswith('min') or tag.endswith('m'):
+        try:
+            return int(''.join(c for c in tag if c.isdigit()))
+        except ValueError:
+            return None
+    return None
+
+
+def spellings(rng, minutes):
+    """Every way of writing `minutes` the parser should understand"""
+    hours, mins = divmod(minutes, 60)
+    space = rng.choice(("", " "))
+    yield f"{minutes}{space}{rng.choice(('m', 'min', 'mins', 'minutes', 'M', 'Min'))}"
+    yield f"{hours}:{mins:02d}"
+    if not hours:
+        yield f":{mins:02d}"
+    if hours and not mins:
+        yield f"{hours}{space}{rng.choice(('h', 'hr', 'hrs', 'hour', 'hours', 'H'))}"
+    if hours and mins:
+        yield f"{hours}h{space}{mins}m"
+    if minutes % 30 == 0:
+        yield f"{minutes / 60:g}h"
+
+
+def malformed(rng):
+    n = rng.randrange(1, 500)
+    return rng.choice((
+        f"{n}m{rng.randrange(1, 60)}m",
+        f"{n}h{n}h",
+        f"{n}.5h{rng.randrange(1, 60)}m",
+        f"{n}:{rng.randrange(60, 100)}",
+        f"{n}x",
+        f"m{n}",
+        f"{n}.{n}m",
+        rng.choice(OTHER_TAGS),
+    ))
+
+
+def check_corpus(cases, seed=0):
+    rng = random.Random(seed)
+    failures = []
+    for _ in range(cases):
+        minutes = rng.randrange(1, 600)
+        for tag in spellings(rng, minutes):
+            if extract_minutes(tag) != minutes:
+                failures.append((tag, extract_minutes(tag), minutes))
+            if tag[-1:].lower() == 'm' and tag[:-1].strip().isdigit():
+                if legacy_extract_minutes(tag) != extract_minutes(tag):
+                    failures.append((tag, extract_minutes(tag), legacy_extract_minutes(tag)))
+        tag = malformed(rng)
+        if extract_minutes(tag) is not None:
+            failures.append((tag, extract_minutes(tag), None))
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--cases", type=int, default=20000)
+    parser.add_argument("--number", type=int, default=200000)
+    args = parser.parse_args()
+
+    failures = check_corpus(args.cases)
+    for tag, got, expected in failures[:20]:
+        print(f"{tag!r}: got {got}, expected {expected}")
+    if failures:
+        raise SystemExit(f"{len(failures)} corpus failures")
+    print(f"corpus: {args.cases} durations, no failures\n")
+
+    tags = ["30min", "15 m", "1h30m", "Errand", "45m", "Home", "1.5h", ":30"]
+    per_call = lambda fn: timeit.timeit(  # noqa: E731
+        lambda: [fn(tag) for tag in tags], number=args.number // len(tags)
+    ) / args.number * 1e9
+    uncached = extract_minutes.__wrapped__
+    print(f"legacy scan     {per_call(legacy_extract_minutes):7.0f} ns/tag")
+    print(f"parser uncached {per_call(uncached):7.0f} ns/tag")
+    print(f"parser cached   {per_call(extract_minutes):7.0f} ns/tag")
+
+    rng = random.Random(1)
+    task_tags = [(i, rng.sample(tags, rng.randrange(0, 4))) for i in range(1000)]
+    elapsed = timeit.timeit(lambda: first_durations(task_tags), number=100) / 100
+    print(f"\nfirst_durations over 1000 tasks: {elapsed * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,104 @@
+"""Legacy Things-interval mode: per-call queries vs the prefetched TaskQueue.
+
+Times one stop of the timer, which used to run the Today join three times on
+fresh connections (the next task's minutes, then the finished task's URL, and
+once more when "Things Interval" is clicked), against the queue's advance,
+which stays in memory. The background refresh that follows is timed apart.
+`open` is not actually launched.
+
+    python -m benchmarks.bench_upnext --tasks 20000
+"""
+import argparse
+import os
+import sqlite3
+import statistics
+import tempfile
+import time
+
+from benchmarks.thingsdb import create_database
+from timebox.upnext import TaskQueue
+
+
+def legacy_get_things_min(db_path, index=0, complete_task=False):
+    """get_things_min as it was, with HEADING joined on the current `heading` column"""
+    try:
+        conn = sqlite3.connect(db_path)
+        sql = ("SELECT TAG.title, TASK.title, \"things:///show?id=\" || TASK.uuid "
+               "FROM TMTask as TASK "
+               "LEFT JOIN TMTaskTag TAGS ON TAGS.tasks = TASK.uuid "
+               "LEFT JOIN TMTag TAG ON TAGS.tags = TAG.uuid "
+               "LEFT OUTER JOIN TMTask PROJECT ON TASK.project = PROJECT.uuid "
+               "LEFT OUTER JOIN TMArea AREA ON TASK.area = AREA.uuid "
+               "LEFT OUTER JOIN TMTask HEADING ON TASK.heading = HEADING.uuid "
+               "WHERE TASK.trashed = 0 AND TASK.status = 0 AND TASK.type = 0 AND TAG.title IS NOT NULL "
+               "AND TASK.start = 1 AND TASK.startdate is NOT NULL "
+               "ORDER BY TASK.todayIndex LIMIT 100")
+        tasks = [[*row] for row in conn.execute(sql)]
+        conn.close()
+        task = tasks[index]
+        if not complete_task:
+            if task[0]:
+                return int(task[0].replace("min", ""))
+        else:
+            return task[2]
+    except Exception:
+        return 60
+
+
+def legacy_stop(db_path):
+    legacy_get_things_min(db_path, 1)
+    legacy_get_things_min(db_path, 0, True)
+    legacy_get_things_min(db_path)
+
+
+def queue_stop(queue):
+    queue.position = 0
+    queue.advance()
+    queue.current_minutes()
+    queue.current_minutes()
+
+
+def median_ms(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = create_database(os.path.join(tmp, "main.sqlite"), tasks=args.tasks, today=args.today)
+        legacy = median_ms(lambda: legacy_stop(db_path), args.repeat)
+
+        queue = TaskQueue(db_path)
+        queue.refresh()
+        stop = median_ms(lambda: queue_stop(queue), args.repeat)
+        unchanged = median_ms(queue.refresh, args.repeat)
+
+        writer = sqlite3.connect(db_path)
+
+        def changed():
+            writer.execute("UPDATE TMTask SET notes = ? WHERE rowid = 1", (str(time.time()),))
+            writer.commit()
+            return queue.refresh()
+
+        reload = median_ms(changed, args.repeat)
+        writer.close()
+        queue.close()
+
+    print(f"stop, per-call queries   {legacy:8.3f} ms on the main thread")
+    print(f"stop, TaskQueue          {stop * 1000:8.1f} us on the main thread")
+    print(f"\nbackground refresh, db unchanged   {unchanged * 1000:8.1f} us")
+    print(f"background refresh, db changed     {reload:8.3f} ms (includes the test write)")
+
+
+if __name__ == "__main__":
+    main()
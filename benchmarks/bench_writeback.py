@@ -0,0 +1,115 @@
+"""Things write-back: one `open` per edit vs batched things:///json calls.
+
+Ends --boxes timeboxes over --tasks to-dos with notes, retag and complete
+write-back on, the way a day of use would, against a RecordingLauncher with
+--delay-ms per launch. Every URL is then decoded again to check the limits
+and coalescing: each to-do appears once, with all of its notes in order, its
+last retag and its completion, no URL is longer than --max-url and no call
+carries more than the 250 items Things accepts. Exits
+non-zero if any check fails.
+
+    python -m benchmarks.bench_writeback --boxes 400 --tasks 120 --max-url 4096
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from urllib.parse import parse_qs, urlsplit
+
+from timebox.actions import ActionDispatcher, RecordingLauncher
+from timebox.writeback import MAX_ITEMS, WriteBack
+
+TIME_TAGS = ["5m", "15m", "25m", "45m", "1h", "90m"]
+
+
+def decode(url):
+    return json.loads(parse_qs(urlsplit(url).query)["data"][0])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--boxes", type=int, default=400)
+    parser.add_argument("--tasks", type=int, default=120)
+    parser.add_argument("--delay-ms", type=float, default=80)
+    parser.add_argument("--max-url", type=int, default=4096)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    rng = random.Random(0)
+    boxes = []
+    for i in range(args.boxes):
+        minutes = rng.randrange(3, 100)
+        boxes.append((f"task-{rng.randrange(args.tasks)}", minutes, rng.random() < 0.3))
+
+    # Before: every update is its own process
+    launcher = RecordingLauncher(delay=args.delay_ms / 1000)
+    actions = ActionDispatcher(launcher, max_pending=args.boxes * 3)
+    start = time.perf_counter()
+    for uuid, minutes, done in boxes:
+        actions.open_url(f"things:///update?id={uuid}&append-notes=%E2%8F%B1%20{minutes}m")
+        actions.open_url(f"things:///update?id={uuid}&tags={minutes}m")
+        if done:
+            actions.open_url(f"things:///update?id={uuid}&completed=true")
+    actions.shutdown()
+    separate = (len(launcher.launched), time.perf_counter() - start)
+
+    launcher = RecordingLauncher(delay=args.delay_ms / 1000)
+    actions = ActionDispatcher(launcher, max_pending=args.boxes * 3)
+    writeback = WriteBack(actions, "token", delay=None, max_url=args.max_url,
+                          tags_of=lambda uuid: ["Work", "25m"], time_tags=lambda: TIME_TAGS)
+    start = time.perf_counter()
+    expected = {}
+    for uuid, minutes, done in boxes:
+        writeback.append_notes(uuid, f"⏱ {minutes}m")
+        writeback.retag(uuid, minutes)
+        if done:
+            writeback.complete(uuid)
+        edit = expected.setdefault(uuid, {"notes": [], "completed": False})
+        edit["notes"].append(f"⏱ {minutes}m")
+        edit["tag"] = writeback.closest_time_tag(minutes)
+        edit["completed"] |= done
+    queued = time.perf_counter() - start
+    urls = writeback.flush()
+    actions.shutdown()
+    batched = (len(launcher.launched), time.perf_counter() - start)
+
+    print(f"{args.boxes} boxes over {args.tasks} to-dos, {args.delay_ms:g} ms per launch\n")
+    print(f"{'one open per edit':<20} {separate[0]:5d} launches  {separate[1]:6.2f} s to drain")
+    print(f"{'batched json':<20} {batched[0]:5d} launches  {batched[1]:6.2f} s to drain "
+          f"({writeback.edits} edits queued in {queued * 1000:.1f} ms)")
+    print(f"\nlongest URL {max(map(len, urls))} of {args.max_url} characters")
+
+    failures = []
+    seen = {}
+    for url in urls:
+        if len(url) > args.max_url:
+            failures.append(f"URL of {len(url)} characters")
+        items = decode(url)
+        if len(items) > MAX_ITEMS:
+            failures.append(f"{len(items)} items in one call")
+        for item in items:
+            if item["id"] in seen:
+                failures.append(f"{item['id']} sent twice")
+            seen[item["id"]] = item["attributes"]
+    for uuid, edit in expected.items():
+        attributes = seen.get(uuid)
+        if attributes is None:
+            failures.append(f"{uuid} never sent")
+            continue
+        if attributes.get("append-notes") != "\n" + "\n".join(edit["notes"]):
+            failures.append(f"{uuid}: notes not coalesced in order")
+        if attributes.get("tags") != ["Work", edit["tag"]]:
+            failures.append(f"{uuid}: tags {attributes.get('tags')}, expected the last retag")
+        if attributes.get("completed", False) != edit["completed"]:
+            failures.append(f"{uuid}: completion lost")
+    if [argv[:2] for argv in launcher.launched] != [["open", "-g"]] * len(urls):
+        failures.append("launched something other than open -g")
+    if failures:
+        print("\n" + "\n".join(failures[:20]))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,202 @@
+"""End-to-end benchmark of the sync pipeline on synthetic Things databases.
+
+Every stage a sync goes through is timed separately at each library size,
+with the menu applied to the in-memory ListMenuBackend instead of rumps.
+Latency percentiles come from repeated runs; peak memory from a separate
+tracemalloc run so tracing doesn't skew the timings. Results are written as
+JSON, and --compare prints the change against an earlier run.
+
+    python -m benchmarks.suite --sizes 100,10000,100000 --output bench.json
+    python -m benchmarks.suite --sizes 1000000 --fixtures ~/.cache/timebox --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks.thingsdb import create_database
+from timebox.countdown import Countdown
+from timebox.menu import ListMenuBackend, MenuReconciler, build_menu
+from timebox.query import TodayQuery
+from timebox.sync import IncrementalSync, SyncGate, build_task_map
+from timebox.tags import extract_minutes, first_durations
+
+
+def on_task(sender, seconds, url):
+    pass
+
+
+class Pipeline:
+    """One fixture database plus the objects a running app would hold"""
+
+    def __init__(self, db_path):
+        self.writer = sqlite3.connect(db_path)
+        self.query = TodayQuery(db_path, extract_minutes)
+        self.task_sync = IncrementalSync(self.query)
+        self.gate = SyncGate(self.query)
+        self.menu = MenuReconciler(ListMenuBackend())
+        self.tasks, _ = self.task_sync.sync()
+        self.menu.apply(build_menu(self.tasks, on_task))
+        self.gate.should_sync()
+        self.today_uuids = [task.uuid for task in self.query.fetch()]
+        self.task_tags = self.writer.execute("""
+            SELECT TAGS.tasks, group_concat(TAG.title, char(31))
+            FROM TMTaskTag AS TAGS JOIN TMTag AS TAG ON TAG.uuid = TAGS.tags
+            WHERE TAGS.tasks IN (SELECT value FROM json_each(?))
+            GROUP BY TAGS.tasks
+        """, (json.dumps(self.today_uuids),)).fetchall()
+        self.countdown = Countdown()
+        self.countdown.start(25 * 60)
+        self.edits = 0
+
+    def edit_today_task(self):
+        """What a user does in Things between syncs: rename one Today task"""
+        self.edits += 1
+        uuid = self.today_uuids[self.edits % len(self.today_uuids)]
+        self.writer.execute(
+            "UPDATE TMTask SET title = ?, userModificationDate = ? WHERE uuid = ?",
+            (f"Edited {self.edits}", time.time(), uuid)
+        )
+        self.writer.commit()
+
+    def touch_outside_today(self):
+        """What Things does constantly: write rows the menu doesn't show"""
+        self.writer.execute(
+            "INSERT OR REPLACE INTO Meta VALUES ('benchmarkTouched', ?)", (str(time.time()),)
+        )
+        self.writer.commit()
+
+    def stages(self):
+        """(name, setup, measured) pairs; setup runs untimed before each sample"""
+        return [
+            ("db_read_full", None, self.query.fetch),
+            ("db_read_incremental", self.edit_today_task, self.task_sync.sync),
+            ("gate", self.touch_outside_today, self.gate.should_sync),
+            ("tag_parse", extract_minutes.cache_clear, lambda: first_durations(
+                (task, tags.split("\x1f")) for task, tags in self.task_tags
+            )),
+            ("task_map", None, lambda: build_task_map(self.query.fetch())),
+            ("menu_build", None, lambda: build_menu(self.tasks, on_task)),
+            ("menu_apply", self.edit_today_task, self.sync_and_apply),
+            ("tick", None, lambda: (self.countdown.title(), self.countdown.next_wakeup())),
+        ]
+
+    def sync_and_apply(self):
+        self.tasks, _ = self.task_sync.sync()
+        return self.menu.apply(build_menu(self.tasks, on_task))
+
+    def close(self):
+        self.query.close()
+        self.writer.close()
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def measure(setup, fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "p50_ms": statistics.median(samples),
+        "p90_ms": percentile(samples, 0.90),
+        "p99_ms": percentile(samples, 0.99),
+        "max_ms": max(samples),
+        "peak_kib": peak / 1024,
+        "samples": len(samples),
+    }
+
+
+def fixture(directory, size, today, seed):
+    path = os.path.join(directory, f"things-{size}-{today}-{seed}.sqlite")
+    if not os.path.exists(path):
+        print(f"generating {size} task fixture...", file=sys.stderr)
+        create_database(path, tasks=size, today=today, seed=seed)
+    return path
+
+
+def print_results(size, results, baseline=None):
+    print(f"\n{size} tasks")
+    print(f"  {'stage':<20} {'p50':>9} {'p90':>9} {'p99':>9} {'max':>9} {'peak':>10}")
+    for stage, r in results.items():
+        line = (f"  {stage:<20} {r['p50_ms']:7.3f}ms {r['p90_ms']:7.3f}ms "
+                f"{r['p99_ms']:7.3f}ms {r['max_ms']:7.3f}ms {r['peak_kib']:7.0f}KiB")
+        if baseline and stage in baseline:
+            line += f"   p50 x{r['p50_ms'] / max(baseline[stage]['p50_ms'], 1e-9):.2f}"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100,10000,100000",
+                        help="comma separated library sizes (tasks)")
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--fixtures", help="directory to keep generated databases in")
+    parser.add_argument("--output", help="write results as JSON")
+    parser.add_argument("--compare", help="earlier JSON results to compare against")
+    args = parser.parse_args()
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+
+    report = {
+        "meta": {
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "today": args.today,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "results": {},
+    }
+
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = os.path.expanduser(args.fixtures) if args.fixtures else tmp
+        os.makedirs(directory, exist_ok=True)
+        for size in (int(size) for size in args.sizes.split(",")):
+            pipeline = Pipeline(fixture(directory, size, args.today, args.seed))
+            try:
+                results = {
+                    name: measure(setup, fn, args.repeat)
+                    for name, setup, fn in pipeline.stages()
+                }
+            finally:
+                pipeline.close()
+            report["results"][str(size)] = results
+            print_results(size, results, baseline.get(str(size)))
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"\nwrote {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""Synthetic Things 3 databases for benchmarking on machines without Things.
+
+    python -m benchmarks.thingsdb /tmp/things.sqlite --tasks 1000000 --today 300
+
+Only the tables and columns that timebox and things.py read are created. Dates
+use the Things encodings: startDate/deadline are packed YYYYYYYYYYYMMMMDDDDD0000000
+integers, creationDate/userModificationDate are unix timestamps.
+"""
+import argparse
+import os
+import plistlib
+import random
+import sqlite3
+import time
+import uuid as uuidlib
+from datetime import date, timedelta
+from typing import Sequence
+
+from timebox.query import things_date
+
+SCHEMA = """
+CREATE TABLE Meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE TMSettings (uuid TEXT PRIMARY KEY, uriSchemeAuthenticationToken TEXT);
+CREATE TABLE TMArea (uuid TEXT PRIMARY KEY, title TEXT, visible INTEGER, "index" INTEGER);
+CREATE TABLE TMAreaTag (areas TEXT, tags TEXT);
+CREATE TABLE TMTag (uuid TEXT PRIMARY KEY, title TEXT, shortcut TEXT, usedDate REAL, parent TEXT, "index" INTEGER);
+CREATE TABLE TMTaskTag (tasks TEXT, tags TEXT);
+CREATE TABLE TMChecklistItem (
+    uuid TEXT PRIMARY KEY, userModificationDate REAL, creationDate REAL, title TEXT,
+    status INTEGER, stopDate REAL, "index" INTEGER, task TEXT
+);
+CREATE TABLE TMTask (
+    uuid TEXT PRIMARY KEY,
+    userModificationDate REAL,
+    creationDate REAL,
+    trashed INTEGER,
+    type INTEGER,
+    title TEXT,
+    notes TEXT,
+    status INTEGER,
+    stopDate REAL,
+    start INTEGER,
+    startDate INTEGER,
+    startBucket INTEGER,
+    reminderTime INTEGER,
+    deadline INTEGER,
+    deadlineSuppressionDate INTEGER,
+    "index" INTEGER,
+    todayIndex INTEGER,
+    todayIndexReferenceDate INTEGER,
+    area TEXT,
+    project TEXT,
+    heading TEXT,
+    rt1_recurrenceRule BLOB
+);
+CREATE INDEX index_TMTask_project ON TMTask(project);
+CREATE INDEX index_TMTask_heading ON TMTask(heading);
+CREATE INDEX index_TMTask_area ON TMTask(area);
+CREATE INDEX index_TMTaskTag_tasks ON TMTaskTag(tasks);
+CREATE INDEX index_TMTaskTag_tags ON TMTaskTag(tags);
+"""
+
+TIME_TAGS = ["5m", "10m", "15min", "20 min", "25m", "30min", "45m", "60min", "90m"]
+OTHER_TAGS = ["Errand", "Home", "Work", "Waiting", "Important", "Low Energy"]
+
+TASK_COLUMNS = (
+    "uuid, userModificationDate, creationDate, trashed, type, title, notes, status, "
+    "stopDate, start, startDate, startBucket, reminderTime, deadline, "
+    'deadlineSuppressionDate, "index", todayIndex, todayIndexReferenceDate, '
+    "area, project, heading, rt1_recurrenceRule"
+)
+
+
+def new_uuid(rng: random.Random) -> str:
+    return str(uuidlib.UUID(int=rng.getrandbits(128)))
+
+
+def create_database(path: str, tasks: int = 20000, today: int = 150, projects: int = 40,
+                    areas: int = 6, headings: int = 2, time_tag_ratio: float = 0.7,
+                    other_tag_ratio: float = 0.4, time_tags: Sequence[str] = TIME_TAGS,
+                    open_ratio: float = 0.25, upcoming: int = 0, upcoming_days: int = 730,
+                    repeating: int = 0, seed: int = 0, chunk: int = 50000) -> str:
+    """Write a Things-schema database with `tasks` to-dos, `today` of them in Today.
+
+    Today tasks are spread through the library rather than clustered, about a
+    third of all tasks sit under a project heading, and outside Today only
+    `open_ratio` are still open (the rest completed or canceled), like a
+    library that has been in use for years. Rows are streamed in chunks so a million tasks
+    doesn't need a million tuples in memory.
+
+    On top of that, `upcoming` open to-dos are scheduled over the next
+    `upcoming_days` days, and `repeating` repeating to-dos each get a template
+    (which carries the recurrence rule and never shows in any list) plus the
+    next instance Things would have scheduled.
+    """
+    rng = random.Random(seed)
+    now = time.time()
+    today_date = things_date(date.today())
+    conn = sqlite3.connect(path)
+    conn.executescript(SCHEMA)
+    conn.execute(
+        "INSERT INTO Meta VALUES ('databaseVersion', ?)",
+        (plistlib.dumps(26).decode(),)
+    )
+
+    area_ids = [new_uuid(rng) for _ in range(areas)]
+    conn.executemany(
+        "INSERT INTO TMArea VALUES (?, ?, 1, ?)",
+        [(a, f"Area {i}", i) for i, a in enumerate(area_ids)]
+    )
+
+    tag_ids = {}
+    for i, title in enumerate(list(time_tags) + OTHER_TAGS):
+        tag_ids[title] = new_uuid(rng)
+        conn.execute(
+            "INSERT INTO TMTag VALUES (?, ?, NULL, NULL, NULL, ?)",
+            (tag_ids[title], title, i)
+        )
+    time_tag_ids = [tag_ids[title] for title in time_tags]
+    other_tag_ids = [tag_ids[title] for title in OTHER_TAGS]
+
+    def task_row(uuid, type_, title, status=0, start=2, start_date=None, today_index=0,
+                 area=None, project=None, heading=None, recurrence=None):
+        return (
+            uuid, now - rng.random() * 86400 * 365, now - 86400 * 400, 0, type_, title, "",
+            status, None, start, start_date, 0, None, None, None, rng.randrange(100000),
+            today_index, None, area, project, heading, recurrence
+        )
+
+    def container():
+        if heading_ids and rng.random() < 0.3:
+            return None, rng.choice(heading_ids)
+        if project_ids and rng.random() < 0.8:
+            return rng.choice(project_ids), None
+        return None, None
+
+    def tag(task_id):
+        if rng.random() < time_tag_ratio:
+            task_tags.append((task_id, rng.choice(time_tag_ids)))
+        if rng.random() < other_tag_ratio:
+            task_tags.append((task_id, rng.choice(other_tag_ids)))
+
+    insert_task = f"INSERT INTO TMTask ({TASK_COLUMNS}) VALUES ({', '.join('?' * 22)})"
+    project_ids = [new_uuid(rng) for _ in range(projects)]
+    heading_ids = []
+    rows = []
+    for i, project_id in enumerate(project_ids):
+        rows.append(task_row(project_id, 1, f"Project {i}", start=1, area=rng.choice(area_ids)))
+        for j in range(headings):
+            heading_ids.append(new_uuid(rng))
+            rows.append(task_row(heading_ids[-1], 2, f"Heading {i}.{j}", project=project_id))
+    conn.executemany(insert_task, rows)
+
+    today_positions = set(rng.sample(range(tasks), min(today, tasks)))
+    rows, task_tags = [], []
+    for i in range(tasks):
+        task_id = new_uuid(rng)
+        project, heading = container()
+
+        if i in today_positions:
+            rows.append(task_row(task_id, 0, f"Task {i}", start=1, start_date=today_date,
+                                 today_index=len(today_positions) + i, project=project,
+                                 heading=heading))
+        else:
+            # Mostly logged, plus someday/anytime backlog
+            status = 0 if rng.random() < open_ratio else rng.choice((2, 3, 3, 3))
+            rows.append(task_row(task_id, 0, f"Task {i}", status=status,
+                                 start=rng.choice((0, 1, 2)), project=project,
+                                 heading=heading))
+
+        tag(task_id)
+
+        if len(rows) >= chunk:
+            conn.executemany(insert_task, rows)
+            conn.executemany("INSERT INTO TMTaskTag VALUES (?, ?)", task_tags)
+            rows, task_tags = [], []
+
+    conn.executemany(insert_task, rows)
+    conn.executemany("INSERT INTO TMTaskTag VALUES (?, ?)", task_tags)
+
+    rows, task_tags = [], []
+    scheduled = lambda: things_date(date.today() + timedelta(rng.randrange(1, upcoming_days + 1)))  # noqa: E731
+    for i in range(upcoming):
+        task_id = new_uuid(rng)
+        project, heading = container()
+        rows.append(task_row(task_id, 0, f"Upcoming {i}", start_date=scheduled(),
+                             project=project, heading=heading))
+        tag(task_id)
+    rule = plistlib.dumps({"fu": 256, "fa": 1, "of": [{"wd": 2}]}, fmt=plistlib.FMT_BINARY)
+    for i in range(repeating):
+        template_id, project, heading = new_uuid(rng), *container()
+        start_date = scheduled()
+        rows.append(task_row(template_id, 0, f"Repeating {i}", start_date=start_date,
+                             project=project, heading=heading, recurrence=rule))
+        first_tag = len(task_tags)
+        tag(template_id)
+        instance_id = new_uuid(rng)
+        rows.append(task_row(instance_id, 0, f"Repeating {i}", start_date=start_date,
+                             project=project, heading=heading))
+        task_tags += [(instance_id, tag_id) for _, tag_id in task_tags[first_tag:]]
+    conn.executemany(insert_task, rows)
+    conn.executemany("INSERT INTO TMTaskTag VALUES (?, ?)", task_tags)
+    conn.commit()
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.close()
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Write a synthetic Things database")
+    parser.add_argument("path")
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--today", type=int, default=150)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--areas", type=int, default=6)
+    parser.add_argument("--headings", type=int, default=2, help="headings per project")
+    parser.add_argument("--time-tag-ratio", type=float, default=0.7)
+    parser.add_argument("--other-tag-ratio", type=float, default=0.4)
+    parser.add_argument("--time-tags", default=",".join(TIME_TAGS),
+                        help="comma separated time tag titles")
+    parser.add_argument("--upcoming", type=int, default=0, help="scheduled to-dos")
+    parser.add_argument("--upcoming-days", type=int, default=730)
+    parser.add_argument("--repeating", type=int, default=0, help="repeating to-dos")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if os.path.exists(args.path):
+        raise SystemExit(f"{args.path} already exists")
+    start = time.perf_counter()
+    create_database(
+        args.path, tasks=args.tasks, today=args.today, projects=args.projects,
+        areas=args.areas, headings=args.headings, time_tag_ratio=args.time_tag_ratio,
+        other_tag_ratio=args.other_tag_ratio, time_tags=args.time_tags.split(","),
+        upcoming=args.upcoming, upcoming_days=args.upcoming_days, repeating=args.repeating,
+        seed=args.seed
+    )
+    print(f"wrote {args.path} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import logging
+import subprocess
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, List, Optional, Sequence
+
+from timebox.metrics import SyncMetrics
+
+# launcher(argv, timeout) -> exit status; raises subprocess.TimeoutExpired
+Launcher = Callable[[Sequence[str], float], int]
+
+
+def subprocess_launcher(argv: Sequence[str], timeout: float) -> int:
+    """Run argv directly, no shell, killing it after `timeout` seconds"""
+    return subprocess.run(list(argv), timeout=timeout, capture_output=True).returncode
+
+
+class RecordingLauncher:
+    """Launcher that runs nothing and remembers what it was asked to run, for benchmarks and Linux"""
+
+    def __init__(self, delay: float = 0.0, returncode: int = 0):
+        self.delay = delay
+        self.returncode = returncode
+        self.lock = threading.Lock()
+        self.launched: List[List[str]] = []
+
+    def __call__(self, argv: Sequence[str], timeout: float) -> int:
+        if self.delay > timeout:
+            time.sleep(timeout)
+            raise subprocess.TimeoutExpired(list(argv), timeout)
+        time.sleep(self.delay)
+        with self.lock:
+            self.launched.append(list(argv))
+        return self.returncode
+
+
+class ActionDispatcher:
+    """Runs side effects (URL opens, scripts, future hooks) off the main thread.
+
+    Actions go to a small thread pool, so at most `workers` child processes
+    run at once, and children are launched from an argv list with a timeout.
+    Submitting never blocks: past `max_pending` queued actions new ones are
+    dropped with a warning rather than piling up behind a hung `open`. Each
+    action's latency from submission to completion and its outcome (ok,
+    failed, timeout, error, dropped) go to `metrics`.
+    """
+
+    def __init__(self, launcher: Launcher = subprocess_launcher, workers: int = 2,
+                 timeout: float = 10.0, max_pending: int = 32,
+                 metrics: Optional[SyncMetrics] = None):
+        self.launcher = launcher
+        self.timeout = timeout
+        self.max_pending = max_pending
+        self.metrics = metrics or SyncMetrics()
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="timebox-action")
+        self.lock = threading.Lock()
+        self.pending = 0
+
+    def submit(self, name: str, fn: Callable, *args) -> Optional[Future]:
+        """Queue fn(*args); returns None if the action was dropped"""
+        submitted = time.perf_counter()
+        with self.lock:
+            if self.pending >= self.max_pending:
+                logging.warning(f"Dropping action {name}: {self.pending} already pending")
+                self.metrics.action(name, "dropped", 0.0)
+                return None
+            self.pending += 1
+        return self.pool.submit(self.run_action, name, submitted, fn, *args)
+
+    def run_action(self, name: str, submitted: float, fn: Callable, *args):
+        outcome = "error"
+        try:
+            result = fn(*args)
+            outcome = "ok"
+            return result
+        except subprocess.TimeoutExpired:
+            outcome = "timeout"
+            logging.warning(f"Action {name} timed out after {self.timeout} s")
+        except subprocess.CalledProcessError as e:
+            outcome = "failed"
+            logging.warning(f"Action {name} failed: {e}")
+        except Exception as e:
+            logging.error(f"Action {name} failed: {e}")
+        finally:
+            with self.lock:
+                self.pending -= 1
+            self.metrics.action(name, outcome, time.perf_counter() - submitted)
+
+    def launch(self, argv: Sequence[str]) -> int:
+        status = self.launcher(argv, self.timeout)
+        if status != 0:
+            raise subprocess.CalledProcessError(status, list(argv))
+        return status
+
+    def run(self, name: str, argv: Sequence[str]) -> Optional[Future]:
+        """Run a program, e.g. a user hook script"""
+        return self.submit(name, self.launch, argv)
+
+    def open_url(self, url: str) -> Optional[Future]:
+        """`open` a URL (things:///show?id=...) with its default handler"""
+        return self.run("open_url", ["open", url])
+
+    def shutdown(self, wait: bool = True):
+        self.pool.shutdown(wait=wait)
@@ -0,0 +1,263 @@
+"""Command line entry point.
+
+Only the menu bar app needs rumps and watchdog, so they are imported when it
+starts; `timebox list` and `timebox total` load nothing beyond sqlite3 and the
+task layer, which keeps them cheap enough for shell prompts and scripts. When
+the app is running they ask it over its control socket instead, and the timer
+commands (status, start, pause, stop, sync) only work that way.
+"""
+import argparse
+import sys
+from datetime import date
+from typing import List, Optional, Tuple
+
+from timebox.menu import day_load_title, format_time
+from timebox.query import DayLoad, TodayTask
+from timebox.sync import TaskMap, task_url
+
+
+def project_totals(tasks: TaskMap):
+    return {
+        project: sum(task.minutes for task in project_tasks.values())
+        for project, project_tasks in tasks.items()
+    }
+
+
+def print_summary(tasks: TaskMap, plan: Optional[List[DayLoad]] = None):
+    """Print today's tasks grouped by project, as shown before the menu bar starts
+
+    Totals come from the plan's SQL aggregation when there is one, and the
+    days after today are listed as the week load.
+    """
+    totals = plan[0].projects if plan else project_totals(tasks)
+    print(f"\n📋 Today's Tasks ({format_time(sum(totals.values()))} total):\n")
+    
+    for project, project_tasks in tasks.items():
+        print(f"\n—— {project} ({format_time(totals.get(project, 0))}) ——")
+        for task in project_tasks.values():
+            print(f"• {task.title} → {task.minutes}m")
+
+    if plan and len(plan) > 1:
+        print("\n\n📅 Week Load:\n")
+        for load in plan[1:]:
+            print(f"• {day_load_title(load)}")
+
+
+def tasks_json(tasks: TaskMap, plan: Optional[List[DayLoad]] = None) -> dict:
+    totals = plan[0].projects if plan else project_totals(tasks)
+    data = {
+        "total_minutes": sum(totals.values()),
+        "projects": [
+            {
+                "project": project,
+                "minutes": totals.get(project, 0),
+                "tasks": [
+                    {"uuid": task.uuid, "title": task.title, "minutes": task.minutes,
+                     "url": task_url(task.uuid)}
+                    for task in project_tasks.values()
+                ]
+            }
+            for project, project_tasks in tasks.items()
+        ]
+    }
+    if plan and len(plan) > 1:
+        data["days"] = [
+            {"date": load.day.isoformat(), "minutes": load.minutes,
+             "tasks": load.tasks, "projects": load.projects}
+            for load in plan[1:]
+        ]
+    return data
+
+
+def tasks_from_json(data: dict) -> Tuple[TaskMap, List[DayLoad]]:
+    """Undo tasks_json, for lists served by the running app"""
+    tasks = {
+        project["project"]: {
+            task["uuid"]: TodayTask(task["uuid"], task["title"], project["project"], task["minutes"], None)
+            for task in project["tasks"]
+        }
+        for project in data["projects"]
+    }
+    today = DayLoad(
+        date.today(),
+        data["total_minutes"],
+        sum(len(project_tasks) for project_tasks in tasks.values()),
+        {project["project"]: project["minutes"] for project in data["projects"]}
+    )
+    return tasks, [today] + [
+        DayLoad(date.fromisoformat(day["date"]), day["minutes"], day["tasks"], day["projects"])
+        for day in data.get("days", ())
+    ]
+
+
+def ask_app(command: str, *args: str):
+    """The running app's answer; raises OSError if it isn't running"""
+    from timebox.control import ControlClient
+
+    with ControlClient(timeout=1.0) as client:
+        return client.request(command, *args)
+
+
+def load_from_app(days=0) -> Optional[Tuple[TaskMap, List[DayLoad]]]:
+    """Today's tasks and plan from the running app, or None to query Things directly"""
+    from timebox.control import ControlError
+
+    try:
+        return tasks_from_json(ask_app("tasks", str(days)))
+    except (OSError, ControlError, ValueError, KeyError):
+        return None
+
+
+def status_line(status: dict) -> str:
+    if status["state"] == "stopped":
+        return "stopped"
+    task = f" {status['task']}" if status["task"] else ""
+    return f"{status['state']} {status['display'].strip()}{task}"
+
+
+def timer_command(args) -> int:
+    from timebox.control import ControlError
+
+    try:
+        task = getattr(args, "task", None)
+        result = ask_app(args.command, *([task] if task else []))
+    except ControlError as e:
+        print(f"timebox: {e}", file=sys.stderr)
+        return 1
+    except OSError:
+        print("timebox: the menu bar app is not running", file=sys.stderr)
+        return 1
+
+    if getattr(args, "json", False):
+        import json
+
+        json.dump(result, sys.stdout, ensure_ascii=False)
+        print()
+    elif isinstance(result, dict):
+        print(status_line(result))
+    return 0
+
+
+def history_command(args) -> int:
+    import sqlite3
+    import time
+
+    from timebox import history
+
+    path = history.default_history_path()
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        if args.command == "export":
+            since = time.time() - args.days * 86400 if args.days else 0.0
+            export = history.export_json if args.format == "json" else history.export_csv
+            export(conn, sys.stdout, since)
+            return 0
+        rows = history.calibration(conn, args.by, args.days)
+    except sqlite3.Error as e:
+        print(f"timebox: could not read session history {path}: {e}", file=sys.stderr)
+        return 1
+
+    if args.json:
+        import json
+
+        json.dump([{**row._asdict(), "ratio": row.ratio} for row in rows], sys.stdout)
+        print()
+        return 0
+    print(f"Estimated vs actual by {args.by}, last {args.days} days:\n")
+    for row in rows:
+        key = format_time(row.key) if args.by == "estimate" else row.key
+        ratio = f"{row.ratio:.0%}" if row.ratio is not None else "-"
+        print(f"• {key}: {format_time(round(row.actual / 60))} of "
+              f"{format_time(round(row.estimated / 60))} ({ratio}, {row.tasks} tasks)")
+    return 0
+
+
+def load_tasks(db_path=None) -> TaskMap:
+    from timebox.sync import build_task_map
+    from timebox.tasks import get_today_query
+
+    return build_task_map(get_today_query(db_path).fetch())
+
+
+def load_plan(db_path=None, days=0) -> List[DayLoad]:
+    from timebox.tasks import get_today_query
+
+    return get_today_query(db_path).plan(days)
+
+
+def non_negative(value: str) -> int:
+    days = int(value)
+    if days < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {days}")
+    return days
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="timebox", description="Timeboxing for Things 3")
+    parser.add_argument("--db", help="path to the Things database (default: TIMEBOX_DB or autodetect)")
+    commands = parser.add_subparsers(dest="command")
+    commands.add_parser("run", help="start the menu bar app (default)")
+    for name, help in (("list", "print today's time-tagged tasks"),
+                       ("total", "print the total time planned for today")):
+        command = commands.add_parser(name, help=help)
+        command.add_argument("--json", action="store_true", help="print JSON")
+        if name == "list":
+            command.add_argument("--days", type=non_negative, default=7,
+                                 help="also show the load of this many days after today")
+    command = commands.add_parser("status", help="print the running timer's state")
+    command.add_argument("--json", action="store_true", help="print JSON")
+    command = commands.add_parser("start", help="start or resume the timer, or time a task")
+    command.add_argument("task", nargs="?", help="Things id, URL or exact title of a Today task")
+    commands.add_parser("pause", help="pause the running timer")
+    commands.add_parser("stop", help="stop the timer")
+    commands.add_parser("sync", help="make the app re-read Things now")
+    command = commands.add_parser("history", help="compare time tags with the time boxes took")
+    command.add_argument("--by", choices=("project", "estimate"), default="project")
+    command.add_argument("--days", type=int, default=90)
+    command.add_argument("--json", action="store_true", help="print JSON")
+    command = commands.add_parser("export", help="write every recorded box to stdout")
+    command.add_argument("--format", choices=("csv", "json"), default="csv")
+    command.add_argument("--days", type=int, default=0, help="only the last N days (default: all)")
+    args = parser.parse_args(argv)
+
+    if args.command in (None, "run"):
+        from timebox import main as app
+
+        return app.main()
+
+    if args.command in ("history", "export"):
+        return history_command(args)
+
+    if args.command not in ("list", "total"):
+        return timer_command(args)
+
+    days = getattr(args, "days", 0)
+    # The app answers from memory; --db asks about some other database
+    loaded = None if args.db else load_from_app(days)
+    if loaded is not None:
+        tasks, plan = loaded
+    else:
+        try:
+            tasks = load_tasks(args.db)
+            plan = load_plan(args.db, days)
+        except Exception as e:
+            print(f"timebox: could not read Things database: {e}", file=sys.stderr)
+            return 1
+
+    if args.json:
+        import json
+
+        data = tasks_json(tasks, plan)
+        if args.command == "total":
+            data = {"total_minutes": data["total_minutes"]}
+        json.dump(data, sys.stdout, ensure_ascii=False)
+        print()
+    elif args.command == "total":
+        print(format_time(plan[0].minutes))
+    else:
+        print_summary(tasks, plan)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
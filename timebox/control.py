@@ -0,0 +1,130 @@
+import json
+import logging
+import os
+import socket
+import socketserver
+import threading
+from typing import Any, Callable, Dict, Optional
+
+
+def default_socket_path() -> str:
+    """Where the menu bar app listens, overridable with TIMEBOX_SOCKET"""
+    return os.path.expanduser(
+        os.getenv('TIMEBOX_SOCKET') or '~/Library/Caches/timebox/control.sock'
+    )
+
+
+class ControlError(Exception):
+    """The app understood the request and refused it"""
+
+
+class ControlHandler(socketserver.StreamRequestHandler):
+    # Drop clients that connect and go quiet
+    timeout = 30
+
+    def handle(self):
+        try:
+            for line in self.rfile:
+                self.wfile.write(self.server.control.reply(line))
+        except (OSError, socket.timeout):
+            pass
+
+
+class ControlServer:
+    """A line-based API for the running app on a Unix-domain socket.
+
+    Each request is one line, `command arg...`, and gets one JSON line back:
+    {"ok": true, "result": ...} or {"ok": false, "error": "..."}. A connection
+    can carry any number of requests, so a status bar polling every second can
+    keep one open. Handlers run on the connection's thread and must only read
+    state the app publishes atomically, or hand work to the main thread.
+    """
+
+    def __init__(self, path: str, handlers: Dict[str, Callable[..., Any]]):
+        self.path = path
+        self.handlers = handlers
+        self.server = None
+        self.thread = None
+
+    def reply(self, line: bytes) -> bytes:
+        words = line.decode("utf-8", "replace").strip().split(maxsplit=1)
+        if not words:
+            return b'{"ok":false,"error":"empty request"}\n'
+        command, args = words[0], words[1:]
+        handler = self.handlers.get(command)
+        try:
+            if handler is None:
+                raise ControlError(f"unknown command {command!r}")
+            response = {"ok": True, "result": handler(*args)}
+        except (ControlError, TypeError, ValueError) as e:
+            response = {"ok": False, "error": str(e)}
+        except Exception as e:
+            logging.error(f"Control command {command} failed: {e}")
+            response = {"ok": False, "error": f"internal error: {e}"}
+        return json.dumps(response, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+
+    def start(self):
+        """Listen on `path`, replacing a socket left behind by a dead process"""
+        if os.path.exists(self.path):
+            try:
+                ControlClient(self.path, timeout=0.5).close()
+            except OSError:
+                os.unlink(self.path)
+            else:
+                raise OSError(f"another timebox is already listening on {self.path}")
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+
+        self.server = socketserver.ThreadingUnixStreamServer(self.path, ControlHandler)
+        self.server.daemon_threads = True
+        self.server.control = self
+        os.chmod(self.path, 0o600)
+        self.thread = threading.Thread(
+            target=self.server.serve_forever, name="timebox-control", daemon=True
+        )
+        self.thread.start()
+        logging.info(f"Control socket listening at {self.path}")
+
+    def stop(self):
+        if self.server is None:
+            return
+        self.server.shutdown()
+        self.server.server_close()
+        self.server = None
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class ControlClient:
+    """Talks to a ControlServer; connecting raises OSError when the app isn't running"""
+
+    def __init__(self, path: Optional[str] = None, timeout: float = 2.0):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(timeout)
+        try:
+            self.sock.connect(path or default_socket_path())
+        except OSError:
+            self.sock.close()
+            raise
+        self.rfile = self.sock.makefile("rb")
+
+    def request(self, command: str, *args: str) -> Any:
+        self.sock.sendall(" ".join((command, *args)).encode() + b"\n")
+        line = self.rfile.readline()
+        if not line:
+            raise ConnectionError("the app closed the connection")
+        response = json.loads(line)
+        if not response["ok"]:
+            raise ControlError(response["error"])
+        return response["result"]
+
+    def close(self):
+        self.rfile.close()
+        self.sock.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,87 @@
+import math
+import time
+from typing import Callable, Optional
+
+# Wake up this much after a display boundary so timer jitter can't land us
+# just before it and schedule a second, near-zero wakeup
+SLACK = 0.005
+
+
+class Countdown:
+    """A timebox measured against time.monotonic() rather than counted ticks.
+
+    Remaining time is always derived from the clock, so late or missed
+    callbacks never make the countdown drift. Pausing banks the elapsed time.
+    `next_wakeup()` says when the display will next change, so the caller can
+    sleep until then instead of polling every second. With `coarse_above` set,
+    the display only shows whole minutes while more than that many seconds
+    remain, which means one wakeup per minute for most of a long box.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic,
+                 coarse_above: Optional[float] = None):
+        self.clock = clock
+        self.coarse_above = coarse_above
+        self.duration = 0.0
+        self.elapsed = 0.0
+        self.started_at = None
+
+    @property
+    def running(self) -> bool:
+        return self.started_at is not None
+
+    def start(self, seconds: float):
+        self.duration = seconds
+        self.elapsed = 0.0
+        self.started_at = self.clock()
+
+    def pause(self):
+        if self.running:
+            self.elapsed += self.clock() - self.started_at
+            self.started_at = None
+
+    def resume(self):
+        if not self.running:
+            self.started_at = self.clock()
+
+    def stop(self):
+        self.duration = 0.0
+        self.elapsed = 0.0
+        self.started_at = None
+
+    def elapsed_seconds(self) -> float:
+        # One read, so a pause on another thread can't clear it in between
+        started_at = self.started_at
+        if started_at is not None:
+            return self.elapsed + self.clock() - started_at
+        return self.elapsed
+
+    def remaining(self) -> float:
+        return self.duration - self.elapsed_seconds()
+
+    def expired(self) -> bool:
+        return self.running and self.remaining() <= 0
+
+    def coarse(self, remaining: float) -> bool:
+        return self.coarse_above is not None and remaining > self.coarse_above
+
+    def title(self) -> str:
+        remaining = max(0.0, self.remaining())
+        if self.coarse(remaining):
+            return f"{math.ceil(remaining / 60):2d}m"
+        seconds = math.ceil(remaining)
+        return f"{seconds // 60:2d}:{seconds % 60:02d}"
+
+    def next_wakeup(self) -> Optional[float]:
+        """Seconds until the title changes or the box expires; None while paused"""
+        if not self.running:
+            return None
+        remaining = self.remaining()
+        if remaining <= 0:
+            return 0.0
+        if self.coarse(remaining):
+            boundary = (math.ceil(remaining / 60) - 1) * 60
+            boundary = max(boundary, self.coarse_above)
+        else:
+            boundary = math.ceil(remaining) - 1
+        return remaining - boundary + SLACK
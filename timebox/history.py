@@ -0,0 +1,261 @@
+import csv
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from typing import IO, Iterator, List, NamedTuple, Optional
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS session (
+    id INTEGER PRIMARY KEY,
+    started REAL NOT NULL,
+    ended REAL NOT NULL,
+    task TEXT,
+    project TEXT,
+    estimate INTEGER,
+    planned REAL NOT NULL,
+    actual REAL NOT NULL,
+    paused REAL NOT NULL,
+    pauses INTEGER NOT NULL,
+    overrun REAL NOT NULL,
+    outcome TEXT NOT NULL
+);
+-- Covers the calibration queries: a range on ended, then per-task sums
+CREATE INDEX IF NOT EXISTS session_ended ON session(ended, task, estimate, project, actual);
+CREATE INDEX IF NOT EXISTS session_task ON session(task, ended);
+"""
+
+COLUMNS = ("started", "ended", "task", "project", "estimate", "planned",
+           "actual", "paused", "pauses", "overrun", "outcome")
+
+INSERT_SQL = f"INSERT INTO session ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})"
+
+# Boxes are summed per task first, so a task that took three boxes counts as
+# one estimate against their total
+CALIBRATION_SQL = """
+    WITH TASKS AS (
+        SELECT task, estimate, project, sum(actual) AS actual, count(*) AS boxes
+        FROM session
+        WHERE ended >= :since AND task IS NOT NULL AND estimate IS NOT NULL
+        GROUP BY task, estimate, project
+    )
+    SELECT {key}, count(*), sum(boxes), sum(estimate) * 60.0, sum(actual)
+    FROM TASKS
+    GROUP BY {key}
+    ORDER BY {key}
+"""
+
+CALIBRATION_KEYS = ("project", "estimate")
+
+
+def default_history_path() -> str:
+    """Where finished timeboxes are recorded, overridable with TIMEBOX_HISTORY"""
+    return os.path.expanduser(
+        os.getenv('TIMEBOX_HISTORY') or '~/Library/Application Support/timebox/history.sqlite'
+    )
+
+
+class Session(NamedTuple):
+    """One timebox, from start to stop or expiry. Times are seconds."""
+    started: float
+    ended: float
+    task: Optional[str]
+    project: Optional[str]
+    estimate: Optional[int]  # minutes, from the task's time tag
+    planned: float
+    actual: float  # time the box ran, pauses excluded
+    paused: float
+    pauses: int
+    overrun: float  # ran past the planned length, e.g. across a sleep
+    outcome: str  # expired, stopped or replaced
+
+
+class Calibration(NamedTuple):
+    key: object
+    tasks: int
+    boxes: int
+    estimated: float
+    actual: float
+
+    @property
+    def ratio(self) -> Optional[float]:
+        return self.actual / self.estimated if self.estimated else None
+
+
+def connect(path: str) -> sqlite3.Connection:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+class SessionRecorder:
+    """Tracks the box in progress on the main thread; only memory and the clock.
+
+    The timer calls begin/pause/resume/end as it changes state, ending the
+    previous box before beginning the next, and end() hands the finished
+    Session to `store`.
+    """
+
+    def __init__(self, store: "HistoryStore", clock=time.monotonic, wall=time.time):
+        self.store = store
+        self.clock = clock
+        self.wall = wall
+        self.current = None
+        self.paused_at = None
+
+    def begin(self, planned: float, task: Optional[str] = None,
+              project: Optional[str] = None, estimate: Optional[int] = None):
+        self.current = {
+            "started": self.wall(), "task": task, "project": project,
+            "estimate": estimate, "planned": planned, "paused": 0.0, "pauses": 0,
+        }
+        self.paused_at = None
+
+    def pause(self):
+        if self.current is not None and self.paused_at is None:
+            self.paused_at = self.clock()
+            self.current["pauses"] += 1
+
+    def resume(self):
+        if self.current is not None and self.paused_at is not None:
+            self.current["paused"] += self.clock() - self.paused_at
+            self.paused_at = None
+
+    def end(self, actual: float, outcome: str) -> Optional[Session]:
+        """Close the box after `actual` seconds of running time"""
+        if self.current is None:
+            return None
+        self.resume()
+        current, self.current = self.current, None
+        session = Session(
+            current["started"], self.wall(), current["task"], current["project"],
+            current["estimate"], current["planned"], actual, current["paused"],
+            current["pauses"], max(0.0, actual - current["planned"]), outcome
+        )
+        self.store.add(session)
+        return session
+
+
+class HistoryStore:
+    """Append-only session history in SQLite, written on a background thread.
+
+    add() only enqueues. The writer waits for a session, then collects more
+    for up to `flush_interval` seconds or `batch_size` rows and inserts them
+    in one transaction, so neither the tick path nor a burst of boxes ever
+    waits on the disk.
+    """
+
+    def __init__(self, path: str, batch_size: int = 256, flush_interval: float = 1.0):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.SimpleQueue()
+        self.written = 0
+        self.failed = False
+        self.thread = None
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop, name="timebox-history", daemon=True)
+        self.thread.start()
+
+    def add(self, session: Session):
+        if not self.failed:
+            self.queue.put(session)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything added so far is on disk"""
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self):
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def loop(self):
+        try:
+            conn = connect(self.path)
+        except (OSError, sqlite3.Error) as e:
+            logging.error(f"Could not open session history {self.path}: {e}")
+            self.failed = True
+            return
+        try:
+            while True:
+                batch, markers, stop = [], [], False
+                item = self.queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is None:
+                        stop = True
+                    elif isinstance(item, threading.Event):
+                        markers.append(item)
+                    else:
+                        batch.append(item)
+                    if stop or markers or len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    self.write(conn, batch)
+                for marker in markers:
+                    marker.set()
+                if stop:
+                    return
+        finally:
+            conn.close()
+
+    def write(self, conn: sqlite3.Connection, batch: List[Session]):
+        try:
+            with conn:
+                conn.executemany(INSERT_SQL, batch)
+            self.written += len(batch)
+        except sqlite3.Error as e:
+            logging.error(f"Could not record {len(batch)} sessions: {e}")
+
+
+def calibration(conn: sqlite3.Connection, by: str = "project", days: int = 90,
+                now: Optional[float] = None) -> List[Calibration]:
+    """Estimated vs actual time per project or per time tag over the last `days`"""
+    if by not in CALIBRATION_KEYS:
+        raise ValueError(f"can only group by {' or '.join(CALIBRATION_KEYS)}")
+    since = (now or time.time()) - days * 86400
+    rows = conn.execute(CALIBRATION_SQL.format(key=by), {"since": since})
+    return [Calibration(*row) for row in rows]
+
+
+def sessions(conn: sqlite3.Connection, since: float = 0.0) -> Iterator[tuple]:
+    """Every session ended after `since`, oldest first, straight off the cursor"""
+    return conn.execute(
+        f"SELECT {', '.join(COLUMNS)} FROM session WHERE ended >= ? ORDER BY ended", (since,)
+    )
+
+
+def export_csv(conn: sqlite3.Connection, out: IO[str], since: float = 0.0) -> int:
+    writer = csv.writer(out)
+    writer.writerow(COLUMNS)
+    count = 0
+    for row in sessions(conn, since):
+        writer.writerow(row)
+        count += 1
+    return count
+
+
+def export_json(conn: sqlite3.Connection, out: IO[str], since: float = 0.0) -> int:
+    """A JSON array written one session at a time, so memory stays flat"""
+    out.write("[")
+    count = 0
+    for row in sessions(conn, since):
+        out.write(",\n" if count else "\n")
+        out.write(json.dumps(dict(zip(COLUMNS, row)), ensure_ascii=False))
+        count += 1
+    out.write("\n]\n" if count else "]\n")
+    return count
@@ -1,11 +1,14 @@
 import rumps
 import time
-import subprocess
-import shlex
 import csv
-import sqlite3
+import logging
 import os
 
+from timebox.actions import ActionDispatcher
+from timebox.locate import THINGS_DB_PATTERNS
+from timebox.tasks import get_things_db_path
+from timebox.upnext import TaskQueue
+
 try:
     from urllib import urlretrieve
 except ImportError:
@@ -14,46 +17,13 @@ except ImportError:
 rumps.debug_mode(True)
 
 SEC_TO_MIN = 60
+THINGS_DB = os.path.expanduser(THINGS_DB_PATTERNS[-1])
 
 
 def timez():
     return time.strftime("%a, %d %b %Y %H:%M:%S +0000", time.localtime())
 
 
-def get_things_min(index=0, complete_task=False):
-    try:
-        conn = sqlite3.connect(os.path.expanduser('~/Library/Containers/com.culturedcode.ThingsMac/Data/Library/Application Support/Cultured Code/Things/Things.sqlite3'))
-        sql = ("SELECT\n"
-               "            TAG.title,\n"
-               "            TASK.title,\n"
-               "            \"things:///show?id=\" || TASK.uuid\n"
-               "            FROM TMTask as TASK\n"
-               "            LEFT JOIN TMTaskTag TAGS ON TAGS.tasks = TASK.uuid\n"
-               "            LEFT JOIN TMTag TAG ON TAGS.tags = TAG.uuid\n"
-               "            LEFT OUTER JOIN TMTask PROJECT ON TASK.project = PROJECT.uuid\n"
-               "            LEFT OUTER JOIN TMArea AREA ON TASK.area = AREA.uuid\n"
-               "            LEFT OUTER JOIN TMTask HEADING ON TASK.actionGroup = HEADING.uuid\n"
-               "            WHERE TASK.trashed = 0 AND TASK.status = 0 AND TASK.type = 0 AND TAG.title IS NOT NULL\n"
-               "            AND TASK.start = 1\n"
-               "            AND TASK.startdate is NOT NULL\n"
-               "            ORDER BY TASK.todayIndex\n"
-               "            LIMIT 100")
-        tasks = []
-        for row in conn.execute(sql):
-            tasks.append([*row])
-        conn.close()
-        task = tasks[index]
-        if not complete_task:
-            if task[0]:
-                return int(task[0].replace("min", ""))
-        else:
-            if task[2]:
-                # print("open the following url: ", task[2])
-                subprocess.call(shlex.split('open '+task[2]))
-    except:
-        return 60
-
-
 class TimerApp(object):
     def __init__(self, timer_interval=1):
         self.timer = rumps.Timer(self.on_tick, 1)
@@ -71,7 +41,18 @@ class TimerApp(object):
             callback = lambda _, j=i: self.set_mins(_, j)
             self.buttons["btn_" + str(i)] = rumps.MenuItem(title=title, callback=callback)
             self.buttons_callback[title] = callback
-        self.interval = get_things_min()*SEC_TO_MIN
+        # Today's tasks are read once here and kept fresh in the background
+        # while a box runs, so stopping the timer never waits on the database
+        try:
+            db_path = get_things_db_path()
+        except FileNotFoundError as e:
+            # The queue logs the failed read and falls back to its default minutes
+            logging.error(f"{e}, trying {THINGS_DB}")
+            db_path = THINGS_DB
+        self.queue = TaskQueue(db_path)
+        self.actions = ActionDispatcher()
+        self.queue.refresh()
+        self.interval = self.queue.current_minutes()*SEC_TO_MIN
         self.button_things = rumps.MenuItem(title="Things Interval ("+str(round(self.interval/SEC_TO_MIN))+"min)", callback=lambda _: self.set_things_mins(_))
         self.button_things.state = True
         self.app.menu = [
@@ -87,7 +68,7 @@ class TimerApp(object):
         self.app.run()
 
     def set_things_mins(self, sender):
-        pass_interval = get_things_min()
+        pass_interval = self.queue.current_minutes()
         print("pass_interval is now", pass_interval)
         self.button_things.title = "Things Interval (" + str(round(pass_interval)) + "min)"
         self.set_mins(sender, pass_interval)
@@ -116,6 +97,7 @@ class TimerApp(object):
 
             # lift off! start the timer
             self.timer.start()
+            self.queue.prefetch()
         else:  # 'Pause Timer'
             sender.title = 'Continue Timer'
             self.timer.stop()
@@ -146,9 +128,13 @@ class TimerApp(object):
         self.button_things.set_callback(lambda _: self.set_things_mins(_))
 
         if self.button_things.state:
-            self.interval = get_things_min(1)*SEC_TO_MIN
+            finished = self.queue.advance()
+            self.interval = self.queue.current_minutes()*SEC_TO_MIN
             self.button_things.title = "Things Interval ("+str(round(self.interval/SEC_TO_MIN))+"min)"
-            get_things_min(0, True)
+            if finished:
+                self.actions.open_url(finished.url)
+            # Pick up the finished task being completed in Things
+            self.queue.prefetch()
 
         self.start_pause_button.title = 'Start Timer'
 
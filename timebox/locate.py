@@ -0,0 +1,101 @@
+import glob
+import logging
+import os
+import threading
+from typing import Dict, List, Optional, Sequence
+
+# Things 3.15+ keeps a ThingsData-* container per database; older versions
+# used the sandbox container. Only the first pattern that matches is used, so
+# a stale pre-migration database never shadows the current one.
+THINGS_DB_PATTERNS = (
+    "~/Library/Group Containers/JLMPQHK86H.com.culturedcode.ThingsMac/ThingsData-*/Things Database.thingsdatabase/main.sqlite",
+    "~/Library/Containers/com.culturedcode.ThingsMac/Data/Library/Application Support/Cultured Code/Things/Things.sqlite3",
+)
+
+
+def container_dir(pattern: str) -> str:
+    """The deepest directory of a pattern without wildcards; its mtime moves when
+    a database directory below it is created, removed or renamed"""
+    parts = pattern.split(os.sep)
+    for index, part in enumerate(parts):
+        if glob.has_magic(part):
+            return os.sep.join(parts[:index]) or os.sep
+    return os.path.dirname(pattern)
+
+
+def mtime_ns(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+class DBLocator:
+    """Resolves the Things database paths once and remembers them.
+
+    Globbing the container patterns walks several directories, so the result
+    is cached against the modification times of the directories the
+    wildcards expand in; paths() only stats those until one of them changes.
+
+    By default only the most recently modified match of the first pattern
+    that matches is used: an older ThingsData-* directory can be a copy left
+    behind by a migration or restore, and reading it would bring back tasks
+    completed since. With `merge` every match of every pattern is read,
+    newest database first.
+    """
+
+    def __init__(self, patterns: Sequence[str] = THINGS_DB_PATTERNS, merge: bool = False):
+        self.patterns = [os.path.expanduser(pattern) for pattern in patterns]
+        self.merge = merge
+        self.containers = sorted({container_dir(pattern) for pattern in self.patterns})
+        self.lock = threading.Lock()
+        self.stamps: Optional[Dict[str, Optional[int]]] = None
+        self.resolved: List[str] = []
+        self.resolves = 0
+
+    def paths(self) -> List[str]:
+        """The databases to read, newest first; empty if there is none"""
+        with self.lock:
+            stamps = {container: mtime_ns(container) for container in self.containers}
+            if stamps != self.stamps:
+                self.resolved = self.resolve()
+                self.stamps = stamps
+            return list(self.resolved)
+
+    def path(self) -> str:
+        """The newest database"""
+        paths = self.paths()
+        if not paths:
+            raise FileNotFoundError("Could not find Things database")
+        return paths[0]
+
+    def invalidate(self):
+        with self.lock:
+            self.stamps = None
+
+    def resolve(self) -> List[str]:
+        self.resolves += 1
+        paths = []
+        for pattern in self.patterns:
+            matches = [path for path in glob.glob(pattern) if path not in paths]
+            matches.sort(key=lambda path: mtime_ns(path) or 0, reverse=True)
+            paths.extend(matches)
+            if matches and not self.merge:
+                break
+        if len(paths) > 1 and not self.merge:
+            logging.warning(
+                f"Found {len(paths)} Things databases, reading the newest {paths[0]} and ignoring "
+                f"{', '.join(paths[1:])}; list them in TIMEBOX_DB to read several"
+            )
+            return paths[:1]
+        if len(paths) > 1:
+            logging.info(f"Reading {len(paths)} Things databases: {', '.join(paths)}")
+        return paths
+
+
+def default_locator() -> DBLocator:
+    """The newest Things database, or every path and pattern match in TIMEBOX_DB (separated by os.pathsep)"""
+    override = os.getenv('TIMEBOX_DB')
+    if override:
+        return DBLocator([path for path in override.split(os.pathsep) if path], merge=True)
+    return DBLocator()
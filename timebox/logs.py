@@ -0,0 +1,56 @@
+import atexit
+import logging
+import os
+import platform
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+FORMAT = '%(asctime)s - %(message)s'
+
+
+def default_log_file() -> str:
+    """timebox.log in the Homebrew log directory, where `brew services` looks"""
+    if platform.processor() == 'arm':
+        brew_log = os.getenv('HOMEBREW_LOGS') or '/opt/homebrew/var/log'
+    else:
+        brew_log = os.getenv('HOMEBREW_LOGS') or '/usr/local/var/log'
+    return os.path.join(brew_log, 'timebox.log')
+
+
+def setup_logging(log_file: Optional[str] = None, max_bytes: int = 5 * 1024 * 1024,
+                  backups: int = 3, level: int = logging.INFO) -> QueueListener:
+    """Configure logging to write to both stdout and the Homebrew log file.
+
+    Logging calls only put the record on a queue; a QueueListener thread does
+    the formatting and the writes, so the AppKit main thread never waits on
+    the terminal or the disk. The log file rotates at `max_bytes`, keeping
+    `backups` old files. Call once from the entry point; the listener is
+    flushed and stopped at exit. NSApp.terminate_ exits without running
+    atexit, so the menu bar app stops the returned listener itself on quit.
+    """
+    log_file = log_file or default_log_file()
+    # Default to stdout for development
+    handlers = [logging.StreamHandler(sys.stdout)]
+    try:
+        handlers.append(RotatingFileHandler(log_file, maxBytes=max_bytes, backupCount=backups))
+    except Exception as e:
+        print(f"Could not set up file logging to {log_file}: {e}")
+
+    formatter = logging.Formatter(FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers, respect_handler_level=True)
+    root = logging.getLogger()
+    for handler in root.handlers[:]:
+        root.removeHandler(handler)
+    root.addHandler(QueueHandler(records))
+    root.setLevel(level)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logging.info(f"Logging to {log_file}")
+    return listener
@@ -1,162 +1,170 @@
 #!/usr/bin/env python3
 import rumps
-import time
-import subprocess
-import shlex
+from AppKit import NSMenu, NSObject
+from PyObjCTools import AppHelper, MachSignals
+import atexit
+import copy
 import logging
-import sys
-import things
-from typing import Dict, Tuple
 from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler
 import os
+import signal
+from concurrent.futures import Future
 from pathlib import Path
-import glob
-import threading
-import platform
-
-# Set up logging
-def setup_logging():
-    """Configure logging to write to both stdout and the Homebrew log file"""
-    # Default to stdout for development
-    handlers = [logging.StreamHandler(sys.stdout)]
-    
-    # Add file handler if running as a service
-    if platform.processor() == 'arm':
-        brew_log = os.getenv('HOMEBREW_LOGS') or '/opt/homebrew/var/log'
-    else:
-        brew_log = os.getenv('HOMEBREW_LOGS') or '/usr/local/var/log'
+from datetime import date
+from timebox.actions import ActionDispatcher
+from timebox.cli import print_summary, tasks_json
+from timebox.control import ControlError, ControlServer, default_socket_path
+from timebox.history import HistoryStore, SessionRecorder, default_history_path
+from timebox.countdown import Countdown
+from timebox.logs import setup_logging
+from timebox.menu import ItemMenuBackend, LazySubmenu, MenuReconciler, build_menu, format_time, QUICK_MINUTES
+from timebox.metrics import NULL_TRACE, SyncMetrics
+from timebox.scheduler import MainThreadQueue, SyncScheduler
+from timebox.snapshot import Snapshot, load_snapshot, save_snapshot
+from timebox.sync import IncrementalSync, SyncGate, task_url
+from timebox.tasks import get_locator, get_today_query
+from timebox.watch import ContainerHandler, ThingsDBHandler
+from timebox.writeback import WriteBack
 
-    log_file = os.path.join(brew_log, 'timebox.log')
-    
+def get_coarse_above() -> float | None:
+    """Seconds left above which the timer only shows whole minutes, from TIMEBOX_COARSE_MINUTES"""
+    minutes = os.getenv('TIMEBOX_COARSE_MINUTES')
+    if not minutes:
+        return None
     try:
-        file_handler = logging.FileHandler(log_file)
-        handlers.append(file_handler)
-    except Exception as e:
-        print(f"Could not set up file logging to {log_file}: {e}")
-    
-    logging.basicConfig(
-        level=logging.INFO,
-        format='%(asctime)s - %(message)s',
-        handlers=handlers
-    )
-    
-    logging.info(f"Logging to {log_file}")
+        return float(minutes) * 60
+    except ValueError:
+        logging.error(f"Ignoring invalid TIMEBOX_COARSE_MINUTES={minutes!r}")
+        return None
 
-setup_logging()
+def get_metrics() -> SyncMetrics:
+    """Sync metrics, on when TIMEBOX_METRICS names the Prometheus file to write"""
+    path = os.getenv('TIMEBOX_METRICS')
+    return SyncMetrics(os.path.expanduser(path) if path else None)
 
-def extract_minutes(tag: str) -> int | None:
-    """Extract minutes from various time formats like '30min', '30 min', '30m', '30 m'"""
-    tag = tag.lower().replace(' ', '')
-    if tag.endswith('min') or tag.endswith('m'):
-        try:
-            minutes = int(''.join(c for c in tag if c.isdigit()))
-            return minutes
-        except ValueError:
-            return None
-    return None
-
-def get_todays_tasks() -> Dict[str, Dict[str, Tuple[int, str]]]:
-    """Get today's tasks from Things, organized by project"""
-    processed_tasks = {}
-    
+def get_plan_days() -> int:
+    """Days after today to show in the Week Load section, from TIMEBOX_PLAN_DAYS (0 hides it)"""
+    days = os.getenv('TIMEBOX_PLAN_DAYS')
+    if not days:
+        return 7
     try:
-        tasks = things.today()
-        for task in tasks:
-            if 'tags' in task:
-                time_tags = []
-                for tag in task['tags']:
-                    if minutes := extract_minutes(tag):
-                        time_tags.append((tag, minutes))
-                
-                if time_tags:
-                    _, minutes = time_tags[0]
-                    project_name = task.get('project_title', 'No Project')
-                    
-                    if project_name not in processed_tasks:
-                        processed_tasks[project_name] = {}
-                    
-                    processed_tasks[project_name][task['title']] = (
-                        minutes,
-                        f"things:///show?id={task['uuid']}"
-                    )
-    except Exception as e:
-        logging.error(f"Error fetching tasks: {e}")
-    
-    return processed_tasks
-
-def format_time(minutes: int) -> str:
-    hours = minutes // 60
-    mins = minutes % 60
-    if hours > 0:
-        return f"{hours}h{f' {mins}m' if mins else ''}"
-    return f"{mins}m"
-
-def get_things_db_path() -> str:
-    """Get the path to the Things database"""
-    base_paths = [
-        "~/Library/Group Containers/JLMPQHK86H.com.culturedcode.ThingsMac/ThingsData-*/Things Database.thingsdatabase/main.sqlite",
-        "~/Library/Containers/com.culturedcode.ThingsMac/Data/Library/Application Support/Cultured Code/Things/Things.sqlite3"
-    ]
-    
-    for path_pattern in base_paths:
-        expanded_path = os.path.expanduser(path_pattern)
-        matching_paths = glob.glob(expanded_path)
-        if matching_paths:
-            return matching_paths[0]
-    
-    raise FileNotFoundError("Could not find Things database")
-
-class ThingsDBHandler(FileSystemEventHandler):
-    def __init__(self, timer_app):
-        self.timer_app = timer_app
-        self.last_sync = 0
-        self.cooldown = 2  # Minimum seconds between syncs
-        self.retry_count = 0
-        self.max_retries = 3
-        self.sync_lock = threading.Lock()
-
-    def on_modified(self, event):
-        # Only sync if enough time has passed since last sync
-        current_time = time.time()
-        if current_time - self.last_sync > self.cooldown:
-            self.last_sync = current_time
-            
-            # Try to acquire lock to prevent multiple syncs
-            if self.sync_lock.acquire(blocking=False):
-                try:
-                    logging.info("Things database changed, syncing...")
-                    # Run sync in a separate thread
-                    threading.Thread(target=self.safe_sync).start()
-                finally:
-                    self.sync_lock.release()
-
-    def safe_sync(self):
-        try:
-            self.timer_app.sync_data()
-            self.retry_count = 0  # Reset retry count on success
-        except Exception as e:
-            if "NSWindow geometry should only be modified on the main thread" in str(e):
-                if self.retry_count < self.max_retries:
-                    self.retry_count += 1
-                    # Only log on first retry
-                    if self.retry_count == 1:
-                        logging.info("Sync failed, will retry in background...")
-                    time.sleep(0.5)
-                    self.safe_sync()
-                else:
-                    logging.error("Max retry attempts reached. Please sync manually.")
-                    self.retry_count = 0
-            else:
-                logging.error(f"Error during sync: {e}")
+        return max(0, int(days))
+    except ValueError:
+        logging.error(f"Ignoring invalid TIMEBOX_PLAN_DAYS={days!r}")
+        return 7
+
+def get_submenus() -> bool:
+    """Whether tasks go into per-project submenus, from TIMEBOX_SUBMENUS"""
+    return os.getenv('TIMEBOX_SUBMENUS', '').lower() in ('1', 'true', 'yes')
+
+def get_writeback_fields() -> frozenset:
+    """What to write back to Things when a box ends, from TIMEBOX_WRITEBACK=notes,retag,complete"""
+    fields = {field.strip() for field in os.getenv('TIMEBOX_WRITEBACK', '').split(',') if field.strip()}
+    unknown = fields - {'notes', 'retag', 'complete'}
+    if unknown:
+        logging.error(f"Ignoring unknown TIMEBOX_WRITEBACK fields: {', '.join(sorted(unknown))}")
+    fields -= unknown
+    # Every write-back is an update, which Things refuses with a dialog
+    # for each call that has no auth token
+    if fields and not os.getenv('TIMEBOX_THINGS_TOKEN'):
+        logging.error("TIMEBOX_WRITEBACK needs TIMEBOX_THINGS_TOKEN; not writing back to Things")
+        return frozenset()
+    return frozenset(fields)
+
+def get_snapshot_path() -> str:
+    """Where the last Today list is kept between launches, overridable with TIMEBOX_SNAPSHOT"""
+    return os.path.expanduser(
+        os.getenv('TIMEBOX_SNAPSHOT') or '~/Library/Caches/timebox/today.json'
+    )
+
+class SubmenuDelegate(NSObject):
+    """Fills a lazy submenu right before AppKit shows it"""
+
+    def menuNeedsUpdate_(self, menu):
+        self.lazy.will_open()
+
+class RumpsMenuBackend(ItemMenuBackend):
+    """Applies reconciler mutations to an NSMenu.
+
+    rumps keys its Menu dict by title, which collides for same-named tasks, so
+    rows go straight into the underlying NSMenu. Rows with a submenu get an
+    empty NSMenu whose delegate fills it on first open. set_callback()
+    registers every item in rumps' process-wide NSApp._ns_to_py_and_callback,
+    so removed rows are taken out of it again.
+    """
+
+    def __init__(self, nsmenu, fixed=None):
+        super().__init__(fixed)
+        self.nsmenu = nsmenu
+
+    def new_item(self, entry):
+        if entry.separator:
+            return rumps.rumps.SeparatorMenuItem()
+        return rumps.MenuItem(
+            title=entry.title,
+            callback=self.dispatch if entry.action else None
+        )
+
+    def attach(self, index, item):
+        self.nsmenu.insertItem_atIndex_(item._menuitem, index)
+
+    def detach(self, item):
+        self.nsmenu.removeItem_(item._menuitem)
+
+    def new_submenu(self, item):
+        nsmenu = NSMenu.alloc().init()
+        lazy = LazySubmenu(RumpsMenuBackend(nsmenu))
+        delegate = SubmenuDelegate.alloc().init()
+        delegate.lazy = lazy
+        # NSMenu holds its delegate weakly, so keep it alive with the item
+        nsmenu.setDelegate_(delegate)
+        item._menuitem.setSubmenu_(nsmenu)
+        return lazy, delegate
+
+    def unregister(self, item):
+        rumps.rumps.NSApp._ns_to_py_and_callback.pop(item._menuitem, None)
 
 class TimerApp:
     def __init__(self):
         self.app = rumps.App("Timebox", "🥊")
-        self.timer = rumps.Timer(self.on_tick, 1)
-        self.timer.stop()
-        self.timer.count = 0
+        self.countdown = Countdown(coarse_above=get_coarse_above())
+        self.box_seconds = 25 * 60
+        self.tick_generation = 0
         self.current_url = None
+        self.current_task = None
+        self.publish_status()
+        self.task_sync = None
+        self.gate = None
+        self.title_before_sync = None
+        self.metrics = get_metrics()
+        # Anything that launches a process runs here, never on the run loop
+        self.actions = ActionDispatcher(metrics=self.metrics)
+        self.snapshot_path = get_snapshot_path()
+        # Boxes are recorded in memory here and written on the history thread
+        self.history = HistoryStore(default_history_path())
+        self.recorder = SessionRecorder(self.history)
+        # Off unless asked for: this edits the user's to-dos
+        self.writeback_fields = get_writeback_fields()
+        self.writeback = self.writeback_fields and WriteBack(
+            self.actions,
+            os.getenv('TIMEBOX_THINGS_TOKEN'),
+            # The sync's own query: get_today_query() may replace the shared
+            # one under the sync worker, and this runs on the flush timer
+            tags_of=lambda uuid: self.task_sync.query.task_tags(uuid),
+            time_tags=lambda: [title for _, title in self.task_sync.query.tags()]
+        )
+        self.plan_days = get_plan_days()
+        self.plan = None
+        # The last task map read, replaced whole so the control socket can serve it
+        self.tasks = None
+        self.submenus = get_submenus()
+        self.summary_printed = False
+        self.stopped = False
+        
+        # DB reads happen on one sync worker; menu changes come back through
+        # this queue and are applied on the AppKit main thread
+        self.ui_queue = MainThreadQueue(lambda: AppHelper.callAfter(self.ui_queue.drain))
+        self.scheduler = SyncScheduler(self.read_sync)
         
         # Menu items with fixed keys
         self.start_button = rumps.MenuItem(
@@ -177,223 +185,409 @@ class TimerApp:
         
         # Quick select buttons
         self.quick_buttons = {}
-        for mins in [5, 10, 15, 20, 25]:
+        for mins in QUICK_MINUTES:
             self.quick_buttons[mins] = rumps.MenuItem(
                 title=f"{mins} Minutes",
                 callback=lambda _, m=mins: self.set_mins(_, m*60, None)
             )
         
-        # Set up menu
-        self.menu_items = [
-            self.start_button,
-            self.sync_button,
-            None,  # separator
-            self.total_time,
-            None,  # separator
-            *self.quick_buttons.values(),
-            None,  # separator
-            self.stop_button
-        ]
-        self.app.menu = self.menu_items
+        # Set up menu; the permanent items are reused on every sync
+        self.menu = MenuReconciler(RumpsMenuBackend(self.app.menu._menu, {
+            "start": self.start_button,
+            "sync": self.sync_button,
+            "total": self.total_time,
+            "stop": self.stop_button,
+            **{f"quick:{mins}": button for mins, button in self.quick_buttons.items()}
+        }))
+        self.menu.apply(build_menu({}, self.set_mins))
         
         # Set up file watching
         self.setup_file_watching()
         
-        # Initial sync
-        self.sync_data()
+        # Show the last known tasks right away and revalidate them on the sync
+        # worker; without a snapshot the first sync reads everything
+        if self.restore_snapshot():
+            self.scheduler.notify()
+        else:
+            self.scheduler.notify(force=True)
+        self.scheduler.start()
+        self.metrics.start()
+        self.history.start()
+        
+        self.control = ControlServer(default_socket_path(), {
+            "status": self.control_status,
+            "tasks": self.control_tasks,
+            "start": self.control_start,
+            "pause": self.control_pause,
+            "stop": self.control_stop,
+            "sync": self.control_sync,
+        })
+        try:
+            self.control.start()
+        except OSError as e:
+            logging.error(f"Could not start the control socket: {e}")
 
     def setup_file_watching(self):
+        # One observer for every database directory, plus the containers new
+        # databases appear in; open_sync() points it at the databases in use
+        self.observer = Observer()
+        self.db_watches = {}
+        self.db_handler = ThingsDBHandler(self.scheduler, self.metrics, [])
         try:
-            db_path = get_things_db_path()
-            db_dir = str(Path(db_path).parent)
-            db_name = Path(db_path).name
-            
-            class FilteredHandler(ThingsDBHandler):
-                def on_modified(self, event):
-                    if Path(event.src_path).name == db_name:
-                        super().on_modified(event)
-            
-            self.observer = Observer()
-            self.observer.schedule(
-                FilteredHandler(self),
-                db_dir,
-                recursive=False
-            )
+            locator = get_locator()
+            container_handler = ContainerHandler(self.scheduler, locator)
+            for container in locator.containers:
+                if os.path.isdir(container):
+                    self.observer.schedule(container_handler, container, recursive=False)
             self.observer.start()
-            logging.info(f"Watching Things database at: {db_path}")
+        except Exception as e:
+            logging.error(f"Could not set up database watching: {e}")
+
+    def watch_databases(self, db_paths):
+        """Watch exactly the directories of `db_paths` with the shared handler"""
+        db_dirs = {str(Path(db_path).parent) for db_path in db_paths}
+        try:
+            for db_dir in set(self.db_watches) - db_dirs:
+                self.observer.unschedule(self.db_watches.pop(db_dir))
+            # Under WAL, commits land in -wal; main.sqlite only changes on checkpoints
+            self.db_handler.names = frozenset(
+                name for db_path in db_paths for name in (Path(db_path).name, f"{Path(db_path).name}-wal")
+            )
+            for db_dir in db_dirs - set(self.db_watches):
+                self.db_watches[db_dir] = self.observer.schedule(self.db_handler, db_dir, recursive=False)
+            logging.info(f"Watching Things database at: {', '.join(db_paths)}")
         except Exception as e:
             logging.error(f"Could not set up database watching: {e}")
 
     def sync_data(self, sender=None):
-        if sender:
-            logging.info("Manual sync triggered")
+        logging.info("Manual sync triggered")
         
-        # Show sync indicator
-        original_title = self.app.title
+        # Show sync indicator until the menu update comes back
+        if self.app.title != "↻":
+            self.title_before_sync = self.app.title
         self.app.title = "↻"
-        
+        self.scheduler.notify(force=True)
+
+    def open_sync(self):
+        """Create the sync state on first use and whenever the located databases
+        change; the databases themselves are opened lazily"""
+        query = get_today_query()
+        if self.task_sync is None or query is not self.task_sync.query:
+            query.parse_minutes = self.metrics.timed("tag_parse", query.parse_minutes)
+            self.task_sync = IncrementalSync(query)
+            self.gate = SyncGate(query)
+            self.watch_databases(query.db_paths)
+
+    def restore_snapshot(self) -> bool:
+        """Render the menu from today's snapshot, if there is one; main thread only"""
+        snapshot = load_snapshot(self.snapshot_path)
+        if snapshot is None or snapshot.day != date.today():
+            return False
         try:
-            tasks = get_todays_tasks()
-            logging.info(f"Retrieved {len(tasks)} projects")
-            
-            # Create fresh instances of permanent menu items
-            start_button = rumps.MenuItem(
-                title=self.start_button.title,  # Preserve the current title state
-                callback=self.start_timer,
-                key="s"
-            )
-            sync_button = rumps.MenuItem(
-                title="Sync",
-                callback=self.sync_data,
-                key="r"
-            )
-            stop_button = rumps.MenuItem(
-                title="Stop Timer",
-                callback=self.stop_timer
-            )
-            total_time = rumps.MenuItem(title="", callback=None)  # Empty title, will be updated later
-            
-            # Create fresh quick select buttons
-            quick_buttons = {}
-            for mins in [5, 10, 15, 20, 25]:
-                quick_buttons[mins] = rumps.MenuItem(
-                    title=f"{mins} Minutes",
-                    callback=lambda _, m=mins: self.set_mins(_, m*60, None)
-                )
-            
-            # Create a fresh menu list
-            new_menu = [
-                start_button,
-                sync_button,
-                None,  # separator
-                total_time,
-                None  # separator
-            ]
-            
-            # Add task items
-            self.task_items = []
-            for project, project_tasks in tasks.items():
-                if project_tasks:
-                    # Add project header
-                    header = rumps.MenuItem(f"—— {project} ——", callback=None)
-                    new_menu.append(header)
-                    self.task_items.append(header)
-                    
-                    # Add tasks
-                    for title, (minutes, url) in project_tasks.items():
-                        item = rumps.MenuItem(
-                            title=f"{title} → {minutes}m",
-                            callback=lambda _, m=minutes, u=url: self.set_mins(_, m*60, u)
-                        )
-                        new_menu.append(item)
-                        self.task_items.append(item)
-            
-            # Add separator and quick buttons only if we have tasks
-            if self.task_items:
-                new_menu.append(None)  # separator
-            
-            # Add the quick select buttons and stop button
-            new_menu.extend([
-                *quick_buttons.values(),
-                None,  # separator
-                stop_button
-            ])
+            self.open_sync()
+        except Exception as e:
+            logging.error(f"Could not open Things database: {e}")
+            return False
+        snapshot.restore(self.task_sync)
+        self.tasks = self.task_sync.task_map()
+        self.plan = snapshot.plan
+        self.menu.apply(build_menu(self.tasks, self.set_mins, self.plan, self.submenus))
+        logging.info(f"Restored {len(snapshot.tasks)} tasks from {self.snapshot_path}")
+        return True
+
+    def write_snapshot(self):
+        try:
+            save_snapshot(self.snapshot_path, Snapshot.capture(self.task_sync, self.plan))
+        except OSError as e:
+            logging.warning(f"Could not write snapshot {self.snapshot_path}: {e}")
+
+    def read_sync(self, force=False):
+        """Read Things on the sync worker and queue the resulting menu update"""
+        trace = self.metrics.trace(force, self.scheduler.waited)
+        outcome = "error"
+        try:
+            self.open_sync()
+            # The gate also runs for forced syncs so its data version stays current
+            with trace.phase("gate"):
+                should_sync = self.gate.should_sync()
+            if not should_sync and not force:
+                # Skip events without a new commit
+                outcome = "suppressed"
+                return
+            if force:
+                self.task_sync.reset()
+            logging.info(f"Syncing tasks... ({self.gate.stats()})")
             
-            # Calculate total time before updating the menu
-            total = sum(
-                time for project in tasks.values() 
-                for time, _ in project.values()
+            with trace.phase("db_read"):
+                tasks, changes = self.task_sync.sync()
+            logging.info(
+                f"Retrieved {len(tasks)} projects "
+                f"(+{len(changes.added)} -{len(changes.removed)} ~{len(changes.updated)})"
             )
-            total_time.title = f"{format_time(total)} of work today!"
             
-            # Clear the existing menu by setting it to just a quit button
-            self.app.menu.clear()
+            plan = None
+            if self.plan_days:
+                # Upcoming edits pass the gate without changing Today
+                with trace.phase("plan"):
+                    plan = self.task_sync.query.plan(self.plan_days)
+            self.tasks = tasks
             
-            # Update the menu with new items
-            self.app.menu = new_menu
-            
-            # Update our references to the new menu items
-            self.start_button = start_button
-            self.sync_button = sync_button
-            self.stop_button = stop_button
-            self.total_time = total_time
-            self.quick_buttons = quick_buttons
-            self.menu_items = new_menu
-            
-            # Restore the app title
-            self.app.title = original_title
-            logging.info("Menu updated successfully")
+            if changes or force or plan != self.plan:
+                self.plan = plan
+                with trace.phase("menu_build"):
+                    entries = build_menu(tasks, self.set_mins, plan, self.submenus)
+                # The trace is finished on the main thread once the menu is applied
+                outcome = "synced"
+                self.ui_queue.put(self.apply_menu, entries, trace)
+                self.write_snapshot()
+            else:
+                outcome = "unchanged"
+                logging.info("No task changes, menu left as is")
+        except Exception as e:
+            logging.error(f"Error syncing tasks: {e}")
+            import traceback
+            logging.error(traceback.format_exc())
+        finally:
+            if outcome != "error" and not self.summary_printed:
+                # Printed from the first sync so startup reads Things only once
+                print_summary(self.task_sync.task_map(), self.plan)
+                self.summary_printed = True
+            if outcome != "synced":
+                trace.finish(outcome)
+            if force:
+                self.ui_queue.put(self.restore_title)
+
+    def apply_menu(self, entries, trace=NULL_TRACE):
+        """Patch the menu; main thread only"""
+        try:
+            with trace.phase("menu_apply"):
+                mutations = self.menu.apply(entries)
+            logging.info(f"Menu updated successfully ({mutations} changes)")
+            trace.finish("synced", mutations=mutations)
         except Exception as e:
             logging.error(f"Error updating menu: {e}")
-            logging.error(f"Exception details: {str(e)}")
             import traceback
             logging.error(traceback.format_exc())
-            self.app.title = original_title
+            trace.finish("error")
+
+    def on_main(self, fn, *args, timeout=2.0):
+        """Run fn on the main thread and wait for its result; for control requests"""
+        future = Future()
+        
+        def run():
+            try:
+                future.set_result(fn(*args))
+            except Exception as e:
+                future.set_exception(e)
+        
+        self.ui_queue.put(run)
+        return future.result(timeout)
+
+    def find_task(self, query):
+        """The Today task with this id, url or title"""
+        for project_tasks in (self.tasks or {}).values():
+            for task in project_tasks.values():
+                if query in (task.uuid, task_url(task.uuid)) or query.lower() == task.title.lower():
+                    return task
+        return None
+
+    def publish_status(self):
+        """Copy the timer state for control_status; nothing changes the copy, so any thread may read it"""
+        self.status = (copy.copy(self.countdown), self.current_url)
+
+    def control_status(self):
+        # The live countdown changes under this thread when the timer is paused
+        countdown, url = self.status
+        if countdown.running:
+            state = "running"
+        elif countdown.duration:
+            state = "paused"
+        else:
+            state = "stopped"
+        stopped = state == "stopped"
+        task = url and self.find_task(url)
+        return {
+            "state": state,
+            "remaining": 0 if stopped else round(max(0.0, countdown.remaining()), 1),
+            "display": "" if stopped else countdown.title(),
+            "task": task.title if task else None,
+            "url": url,
+        }
 
-    def set_mins(self, sender, seconds, url):
-        self.timer.end = seconds
-        self.current_url = url
-        self.start_timer(sender)
+    def control_tasks(self, days=None):
+        tasks, plan = self.tasks, self.plan
+        if tasks is None:
+            raise ControlError("tasks not loaded yet")
+        if days is not None:
+            days = int(days)
+            if days < 0:
+                raise ControlError(f"days must be 0 or more, not {days}")
+            if days and (not plan or len(plan) <= days):
+                raise ControlError(f"the app plans {self.plan_days} days ahead, not {days}")
+            plan = plan and plan[:days + 1]
+        return tasks_json(tasks, plan)
+
+    def control_start(self, task=None):
+        if task is None:
+            self.on_main(self.resume_timer)
+        else:
+            found = self.find_task(task)
+            if found is None:
+                raise ControlError(f"no Today task matches {task!r}")
+            self.on_main(self.set_mins, None, found.minutes * 60, found.uuid)
+        return self.control_status()
+
+    def control_pause(self):
+        self.on_main(self.pause_timer)
+        return self.control_status()
+
+    def control_stop(self):
+        self.on_main(self.stop_timer)
+        return self.control_status()
+
+    def control_sync(self):
+        self.on_main(self.sync_data)
+        return self.control_status()
+
+    def restore_title(self):
+        if self.app.title == "↻" and self.title_before_sync is not None:
+            self.app.title = self.title_before_sync
+
+    def set_mins(self, sender, seconds, uuid):
+        self.box_seconds = seconds
+        self.current_url = uuid and task_url(uuid)
+        # (uuid, project, estimate) for the history. The clicked row's uuid
+        # and minutes stand even if a sync dropped the task since the menu
+        # was drawn; only the project needs the lookup.
+        task = uuid and self.find_task(uuid)
+        self.current_task = uuid and (uuid, task.project if task else None, seconds // 60)
+        # Always start a fresh box from the Start/Pause button, which now
+        # survives syncs, rather than toggling the clicked item's title
+        self.start_button.title = "Start Timer"
+        self.start_timer(self.start_button)
 
     def start_timer(self, sender):
         if sender.title.startswith(("Start", "Continue")):
             if sender.title == "Start Timer":
-                self.timer.count = 0
+                self.write_back(self.recorder.end(self.countdown.elapsed_seconds(), "replaced"))
+                self.countdown.start(self.box_seconds)
+                self.recorder.begin(self.box_seconds, *(self.current_task or ()))
+            else:
+                self.countdown.resume()
+                self.recorder.resume()
             sender.title = "Pause Timer"
-            self.timer.start()
+            self.on_tick(self.cancel_tick())
         else:
             sender.title = "Continue Timer"
-            self.timer.stop()
+            self.countdown.pause()
+            self.recorder.pause()
+            self.cancel_tick()
+        self.publish_status()
 
-    def stop_timer(self, sender=None):
-        self.timer.stop()
-        self.timer.count = 0
+    def resume_timer(self):
+        if not self.countdown.running:
+            self.start_timer(self.start_button)
+
+    def pause_timer(self):
+        if self.countdown.running:
+            self.start_timer(self.start_button)
+
+    def stop_timer(self, sender=None, outcome="stopped"):
+        self.write_back(self.recorder.end(self.countdown.elapsed_seconds(), outcome))
+        self.countdown.stop()
+        self.publish_status()
+        self.cancel_tick()
         self.app.title = "🥊"
         self.start_button.title = "Start Timer"
 
-    def on_tick(self, timer):
+    def write_back(self, session):
+        """Queue the configured Things updates for a finished box; only memory here"""
+        if not self.writeback or session is None or session.task is None or session.actual < 60:
+            return
+        minutes = round(session.actual / 60)
+        if 'notes' in self.writeback_fields:
+            self.writeback.append_notes(
+                session.task, f"⏱ {format_time(minutes)} timeboxed {date.today().isoformat()}"
+            )
+        if 'retag' in self.writeback_fields:
+            self.writeback.retag(session.task, minutes)
+        if 'complete' in self.writeback_fields and session.outcome == "expired":
+            self.writeback.complete(session.task)
+
+    def shutdown(self):
+        """Close the box in progress and flush history, write-back and metrics; only the first call counts"""
+        if self.stopped:
+            return
+        self.stopped = True
+        logging.info("Shutting down...")
+        self.control.stop()
+        self.write_back(self.recorder.end(self.countdown.elapsed_seconds(), "stopped"))
+        self.history.close()
+        if self.writeback:
+            # Edits are held for a few seconds; send them and let the batch
+            # reach Things before exiting
+            self.writeback.flush()
+            self.actions.shutdown()
+        # Flush the last interval of metrics
+        self.metrics.stop()
+
+    def cancel_tick(self) -> int:
+        """Invalidate any pending tick; returns the new generation"""
+        self.tick_generation += 1
+        return self.tick_generation
+
+    def schedule_tick(self) -> int:
+        """Wake up when the title next changes instead of every second"""
+        generation = self.cancel_tick()
+        delay = self.countdown.next_wakeup()
+        if delay is not None:
+            AppHelper.callLater(delay, self.on_tick, generation)
+        return generation
+
+    def on_tick(self, generation):
         """Handle timer ticks"""
-        time_left = timer.end - timer.count
-        mins = time_left // 60 if time_left >= 0 else time_left // 60 + 1
-        secs = time_left % 60 if time_left >= 0 else (-1 * time_left) % 60
+        if generation != self.tick_generation:
+            return  # paused, stopped or rescheduled since
         
-        if mins == 0 and time_left < 0:
+        if self.countdown.expired():
             rumps.notification(
                 title="Timebox",
                 subtitle="Time is up! Take a break :)",
                 message=""
             )
             if self.current_url:
-                subprocess.call(shlex.split(f"open '{self.current_url}'"))
+                self.actions.open_url(self.current_url)
                 self.current_url = None
-            self.stop_timer()
+            self.stop_timer(outcome="expired")
         else:
-            self.app.title = f"{mins:2d}:{secs:02d}"
-        timer.count += 1
+            self.app.title = self.countdown.title()
+            self.schedule_tick()
 
 def main():
-    tasks = get_todays_tasks()
-    
-    # Print summary in terminal
-    total_minutes = sum(
-        time for project in tasks.values() 
-        for time, _ in project.values()
-    )
-    print(f"\n📋 Today's Tasks ({format_time(total_minutes)} total):\n")
-    
-    for project, project_tasks in tasks.items():
-        project_time = sum(time for time, _ in project_tasks.values())
-        print(f"\n—— {project} ({format_time(project_time)}) ——")
-        for title, (minutes, url) in project_tasks.items():
-            print(f"• {title} → {minutes}m")
-    
-    print("\nStarting menu bar app...")
+    listener = setup_logging()
+    print("Starting menu bar app...")
     
+    timer_app = TimerApp()
+
+    # Quit and SIGTERM (`brew services stop`) end in NSApp.terminate_, which
+    # exits without returning here or running atexit, so everything still in
+    # memory is flushed from applicationWillTerminate
+    @rumps.events.before_quit
+    def shutdown():
+        timer_app.shutdown()
+        listener.stop()
+        atexit.unregister(listener.stop)
+
+    # Delivered through the run loop; a plain signal handler would wait for
+    # the next Python callback
+    MachSignals.signal(signal.SIGTERM, lambda signum: rumps.quit_application())
     try:
-        TimerApp().app.run()
+        timer_app.app.run()
     except KeyboardInterrupt:
-        logging.info("Shutting down...")
         # The observer will be stopped when the process ends
+        pass
+    finally:
+        timer_app.shutdown()
 
 if __name__ == "__main__":
     main()
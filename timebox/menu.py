@@ -0,0 +1,360 @@
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from timebox.query import DayLoad, TodayTask
+from timebox.sync import TaskMap
+
+QUICK_MINUTES = [5, 10, 15, 20, 25]
+PAGE_SIZE = 25
+
+
+class Submenu(NamedTuple):
+    """Contents of a submenu, laid out only when it is opened.
+
+    `rows` is the project's tasks, so two submenus compare equal exactly when
+    they would show the same tasks.
+    """
+    rows: Tuple[TodayTask, ...]
+    on_task: Callable
+    page_size: int = PAGE_SIZE
+    start: int = 0
+
+    def entries(self) -> List["MenuEntry"]:
+        end = self.start + self.page_size
+        entries = [task_entry(task, self.on_task) for task in self.rows[self.start:end]]
+        if end < len(self.rows):
+            entries.append(MenuEntry("more", "More…", submenu=self._replace(start=end)))
+        return entries
+
+
+class MenuEntry(NamedTuple):
+    """Desired state of one menu row.
+
+    `key` identifies the row across syncs. A `title` of None leaves the title to
+    whoever owns the item (e.g. the Start/Pause button). Clicking calls
+    `action(sender, *args)`. A row with a `submenu` opens it instead.
+    """
+    key: str
+    title: Optional[str] = None
+    action: Optional[Callable] = None
+    args: Tuple = ()
+    separator: bool = False
+    submenu: Optional[Submenu] = None
+
+
+def separator(key: str) -> MenuEntry:
+    return MenuEntry(key, separator=True)
+
+
+def task_entry(task: TodayTask, on_task: Callable) -> MenuEntry:
+    """A task row; clicking calls on_task(sender, seconds, uuid)"""
+    return MenuEntry(
+        f"task:{task.uuid}",
+        f"{task.title} → {task.minutes}m",
+        on_task,
+        (task.minutes * 60, task.uuid)
+    )
+
+
+class MenuBackend:
+    """Index-based view of a menu that the reconciler mutates"""
+
+    def insert(self, index: int, entry: MenuEntry):
+        raise NotImplementedError
+
+    def remove(self, index: int, key: str):
+        raise NotImplementedError
+
+    def update(self, index: int, entry: MenuEntry):
+        raise NotImplementedError
+
+
+class ListMenuBackend(MenuBackend):
+    """In-memory backend that counts mutations, for running without AppKit"""
+
+    def __init__(self):
+        self.entries: List[MenuEntry] = []
+        self.submenus: Dict[str, LazySubmenu] = {}
+        self.inserts = 0
+        self.removes = 0
+        self.updates = 0
+
+    def insert(self, index, entry):
+        self.entries.insert(index, entry)
+        self.inserts += 1
+        self.set_submenu(entry)
+
+    def remove(self, index, key):
+        del self.entries[index]
+        self.submenus.pop(key, None)
+        self.removes += 1
+
+    def update(self, index, entry):
+        self.entries[index] = entry
+        self.updates += 1
+        self.set_submenu(entry)
+
+    def set_submenu(self, entry: MenuEntry):
+        if entry.submenu is not None:
+            if entry.key not in self.submenus:
+                self.submenus[entry.key] = LazySubmenu(type(self)())
+            self.submenus[entry.key].set(entry.submenu)
+
+    def open(self, key: str) -> "ListMenuBackend":
+        """Open a submenu the way AppKit would, filling it if needed"""
+        submenu = self.submenus[key]
+        submenu.will_open()
+        return submenu.reconciler.backend
+
+    def click(self, key: str):
+        entry = next(entry for entry in self.entries if entry.key == key)
+        entry.action(entry, *entry.args)
+
+    def titles(self) -> List[Optional[str]]:
+        return [None if entry.separator else entry.title for entry in self.entries]
+
+    def mutations(self) -> int:
+        """Mutations here and in every submenu filled so far"""
+        return self.inserts + self.removes + self.updates + sum(
+            submenu.reconciler.backend.mutations() for submenu in self.submenus.values()
+        )
+
+
+class ItemMenuBackend(MenuBackend):
+    """Backend over toolkit menu items, keeping what it takes to release them.
+
+    Items look like rumps.MenuItem: a `title` and `set_callback()`, which
+    registers the item with the toolkit. Subclasses create and place the items
+    (new_item, attach, detach), build the LazySubmenu behind a row
+    (new_submenu) and drop the toolkit's reference to a removed item
+    (unregister). The permanent items are passed in by key and reused, which
+    keeps their identity and state; they are never released.
+    """
+
+    def __init__(self, fixed: Optional[Dict[str, object]] = None):
+        self.fixed = fixed or {}
+        self.items: List[object] = []
+        # Keyed by id(item): the entry a click dispatches to, and the
+        # (LazySubmenu, anything to keep alive with it) behind a row
+        self.entries: Dict[int, MenuEntry] = {}
+        self.submenus: Dict[int, Tuple["LazySubmenu", object]] = {}
+
+    def new_item(self, entry: MenuEntry):
+        raise NotImplementedError
+
+    def attach(self, index: int, item):
+        raise NotImplementedError
+
+    def detach(self, item):
+        raise NotImplementedError
+
+    def new_submenu(self, item) -> Tuple["LazySubmenu", object]:
+        raise NotImplementedError
+
+    def unregister(self, item):
+        raise NotImplementedError
+
+    def insert(self, index, entry):
+        if not entry.separator and entry.key in self.fixed:
+            item = self.fixed[entry.key]
+        else:
+            item = self.new_item(entry)
+        self.attach(index, item)
+        self.items.insert(index, item)
+        self.update(index, entry)
+
+    def remove(self, index, key):
+        item = self.items.pop(index)
+        self.detach(item)
+        if key not in self.fixed:
+            self.release(item)
+
+    def release(self, item):
+        """Drop every reference to a removed row, its submenu's rows included.
+
+        Toolkits like rumps register items process-wide, which would otherwise
+        keep every row ever shown alive for the life of the app.
+        """
+        self.entries.pop(id(item), None)
+        submenu = self.submenus.pop(id(item), None)
+        if submenu is not None:
+            child = submenu[0].reconciler.backend
+            for child_item in child.items:
+                child.release(child_item)
+        self.unregister(item)
+
+    def update(self, index, entry):
+        item = self.items[index]
+        if entry.separator:
+            return
+        if entry.title is not None and item.title != entry.title:
+            item.title = entry.title
+        if entry.key not in self.fixed:
+            item.set_callback(self.dispatch if entry.action else None)
+            self.entries[id(item)] = entry
+        if entry.submenu is not None:
+            if id(item) not in self.submenus:
+                self.submenus[id(item)] = self.new_submenu(item)
+            self.submenus[id(item)][0].set(entry.submenu)
+
+    def dispatch(self, sender):
+        entry = self.entries[id(sender)]
+        entry.action(sender, *entry.args)
+
+
+class MenuReconciler:
+    """Patches a menu into the desired state with as few mutations as possible.
+
+    Rows are matched by key: rows whose key disappeared are removed, new keys are
+    inserted where they belong and surviving rows are only touched when their
+    title or action changed, so items keep their identity across syncs.
+    """
+
+    def __init__(self, backend: MenuBackend):
+        self.backend = backend
+        self.current: List[MenuEntry] = []
+
+    def apply(self, desired: List[MenuEntry]) -> int:
+        """Reconcile the menu with `desired`; returns the number of mutations"""
+        mutations = 0
+        wanted = {entry.key for entry in desired}
+        if len(wanted) != len(desired):
+            raise ValueError("duplicate menu keys")
+
+        # Drop vanished rows back to front so indices stay valid
+        for index in range(len(self.current) - 1, -1, -1):
+            if self.current[index].key not in wanted:
+                self.backend.remove(index, self.current[index].key)
+                del self.current[index]
+                mutations += 1
+
+        present = {entry.key for entry in self.current}
+        for index, entry in enumerate(desired):
+            current = self.current[index] if index < len(self.current) else None
+            if current is not None and current.key == entry.key:
+                if current != entry:
+                    self.backend.update(index, entry)
+                    self.current[index] = entry
+                    mutations += 1
+                continue
+
+            if entry.key in present:
+                # Moved up: take it out of its old slot further down
+                old_index = next(
+                    i for i in range(index + 1, len(self.current))
+                    if self.current[i].key == entry.key
+                )
+                self.backend.remove(old_index, entry.key)
+                del self.current[old_index]
+                mutations += 1
+
+            self.backend.insert(index, entry)
+            self.current.insert(index, entry)
+            present.add(entry.key)
+            mutations += 1
+
+        return mutations
+
+    def keys(self) -> List[str]:
+        return [entry.key for entry in self.current]
+
+
+class LazySubmenu:
+    """The child menu behind a row with a submenu.
+
+    Its rows are reconciled from the row's Submenu only when the menu is about
+    to open, and only if the Submenu changed since the last fill, so closed
+    submenus cost nothing however many tasks they hold.
+    """
+
+    def __init__(self, backend: MenuBackend):
+        self.reconciler = MenuReconciler(backend)
+        self.submenu: Optional[Submenu] = None
+        self.stale = False
+
+    def set(self, submenu: Submenu):
+        if submenu != self.submenu:
+            self.submenu = submenu
+            self.stale = True
+
+    def will_open(self) -> int:
+        """Bring the rows up to date; returns the number of mutations"""
+        if not self.stale:
+            return 0
+        self.stale = False
+        return self.reconciler.apply(self.submenu.entries())
+
+
+def format_time(minutes: int) -> str:
+    hours = minutes // 60
+    mins = minutes % 60
+    if hours > 0:
+        return f"{hours}h{f' {mins}m' if mins else ''}"
+    return f"{mins}m"
+
+
+def day_load_title(load: DayLoad) -> str:
+    if not load.tasks:
+        return f"{load.day:%a} {load.day.day}: free"
+    tasks = "1 task" if load.tasks == 1 else f"{load.tasks} tasks"
+    return f"{load.day:%a} {load.day.day}: {format_time(load.minutes)} ({tasks})"
+
+
+def build_menu(tasks: TaskMap, on_task: Callable,
+               plan: Optional[List[DayLoad]] = None,
+               submenus: bool = False, page_size: int = PAGE_SIZE) -> List[MenuEntry]:
+    """Lay out the whole menu for a task map.
+
+    The permanent rows (start, sync, total, quick buttons, stop) carry no action
+    here; their items are created once by the app and keep their own callbacks.
+    With a `plan` (today first) the total comes from it and the days after
+    today get a "Week Load" section. With `submenus` each project is one row
+    whose tasks open in a submenu of `page_size` rows plus "More…", so the
+    top level grows with the number of projects, not tasks.
+    """
+    if plan:
+        total = plan[0].minutes
+    else:
+        total = sum(
+            task.minutes for project in tasks.values()
+            for task in project.values()
+        )
+    entries = [
+        MenuEntry("start"),
+        MenuEntry("sync", "Sync"),
+        separator("separator:total"),
+        MenuEntry("total", f"{format_time(total)} of work today!"),
+        separator("separator:tasks"),
+    ]
+
+    has_tasks = False
+    for project, project_tasks in tasks.items():
+        if project_tasks:
+            has_tasks = True
+            if submenus:
+                minutes = sum(task.minutes for task in project_tasks.values())
+                entries.append(MenuEntry(
+                    f"project:{project}",
+                    f"{project} ({format_time(minutes)})",
+                    submenu=Submenu(tuple(project_tasks.values()), on_task, page_size)
+                ))
+                continue
+            entries.append(MenuEntry(f"project:{project}", f"—— {project} ——"))
+            entries.extend(task_entry(task, on_task) for task in project_tasks.values())
+
+    has_week = bool(plan) and len(plan) > 1
+    if has_week:
+        if has_tasks:
+            entries.append(separator("separator:week"))
+        entries.append(MenuEntry("week", "—— Week Load ——"))
+        entries.extend(
+            MenuEntry(f"week:{load.day.isoformat()}", day_load_title(load)) for load in plan[1:]
+        )
+
+    # Separate the tasks from the quick buttons only if we have tasks
+    if has_tasks or has_week:
+        entries.append(separator("separator:quick"))
+
+    entries.extend(MenuEntry(f"quick:{mins}", f"{mins} Minutes") for mins in QUICK_MINUTES)
+    entries.append(separator("separator:stop"))
+    entries.append(MenuEntry("stop", "Stop Timer"))
+    return entries
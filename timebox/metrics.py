@@ -0,0 +1,239 @@
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import Callable, Dict, List, Optional
+
+# Upper bounds in seconds; a sync on a large library sits around 10-50 ms
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+logger = logging.getLogger("timebox.metrics")
+
+
+class Histogram:
+    def __init__(self, buckets=BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, seconds: float):
+        for i, bound in enumerate(self.buckets):
+            if seconds <= bound:
+                self.counts[i] += 1
+                break
+        self.sum += seconds
+        self.count += 1
+
+
+def histogram_lines(metric: str, label: str, histograms: Dict[str, Histogram]) -> List[str]:
+    lines = []
+    for value, histogram in sorted(histograms.items()):
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            lines.append(f'{metric}_bucket{{{label}="{value}",le="{bound}"}} {cumulative}')
+        lines.append(f'{metric}_bucket{{{label}="{value}",le="+Inf"}} {histogram.count}')
+        lines.append(f'{metric}_sum{{{label}="{value}"}} {histogram.sum:.6f}')
+        lines.append(f'{metric}_count{{{label}="{value}"}} {histogram.count}')
+    return lines
+
+
+class SyncTrace:
+    """Phase durations of one sync.
+
+    Created on the sync worker and, when the menu changes, handed to the main
+    thread with the menu update so menu_apply lands in the same record.
+    """
+
+    def __init__(self, metrics: "SyncMetrics", force: bool, waited: Optional[float]):
+        self.metrics = metrics
+        self.force = force
+        self.started = time.perf_counter()
+        self.phases: Dict[str, float] = {}
+        if waited is not None:
+            self.phases["scheduled"] = waited
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    def add(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    def finish(self, outcome: str, **fields):
+        self.metrics.finish(self, outcome, fields)
+
+
+class NullTrace:
+    """What a trace costs when metrics are off: nothing"""
+
+    NULL_PHASE = nullcontext()
+
+    def phase(self, name: str):
+        return self.NULL_PHASE
+
+    def add(self, name: str, seconds: float):
+        pass
+
+    def finish(self, outcome: str, **fields):
+        pass
+
+
+NULL_TRACE = NullTrace()
+
+
+class SyncMetrics:
+    """Per-phase sync timings and counters.
+
+    Phases are event received -> sync started (scheduled), gate, db_read,
+    tag_parse, plan, menu_build and menu_apply, plus the total. Tag parsing runs
+    inside SQLite as part of the read, so tag_parse is also counted in
+    db_read. Every finished sync is logged as one JSON line on the
+    timebox.metrics logger, and when `path` is set a background thread
+    rewrites it every `interval` seconds in the Prometheus text format (for
+    node_exporter's textfile collector or anything that can scrape a file).
+    Side effects run by the ActionDispatcher report here too, as a latency
+    histogram and outcome counts per action.
+
+    With `enabled=False` traces are a shared no-op and nothing is recorded.
+    """
+
+    def __init__(self, path: Optional[str] = None, enabled: Optional[bool] = None,
+                 interval: float = 15.0):
+        self.path = path
+        self.enabled = path is not None if enabled is None else enabled
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.histograms: Dict[str, Histogram] = {}
+        self.action_histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, int] = {}
+        self.active: Optional[SyncTrace] = None
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def trace(self, force: bool = False, waited: Optional[float] = None):
+        if not self.enabled:
+            return NULL_TRACE
+        self.active = SyncTrace(self, force, waited)
+        return self.active
+
+    def timed(self, phase: str, fn: Callable) -> Callable:
+        """Wrap `fn` so its run time is added to the active trace's `phase`"""
+        if not self.enabled:
+            return fn
+
+        def wrapper(*args):
+            start = time.perf_counter()
+            try:
+                return fn(*args)
+            finally:
+                trace = self.active
+                if trace is not None:
+                    trace.add(phase, time.perf_counter() - start)
+
+        return wrapper
+
+    def count(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def finish(self, trace: SyncTrace, outcome: str, fields: dict):
+        total = trace.phases.get("scheduled", 0.0) + time.perf_counter() - trace.started
+        with self.lock:
+            if self.active is trace:
+                self.active = None
+            key = f"syncs:{outcome}"
+            self.counters[key] = self.counters.get(key, 0) + 1
+            for name, seconds in (*trace.phases.items(), ("total", total)):
+                if name not in self.histograms:
+                    self.histograms[name] = Histogram()
+                self.histograms[name].observe(seconds)
+
+        logger.info(json.dumps({
+            "event": "sync",
+            "outcome": outcome,
+            "force": trace.force,
+            **{f"{name}_ms": round(seconds * 1000, 3) for name, seconds in trace.phases.items()},
+            "total_ms": round(total * 1000, 3),
+            **fields,
+        }))
+
+    def action(self, name: str, outcome: str, seconds: float):
+        """Record one dispatched action, from submission to completion"""
+        if not self.enabled:
+            return
+        with self.lock:
+            key = f"actions:{name}:{outcome}"
+            self.counters[key] = self.counters.get(key, 0) + 1
+            if name not in self.action_histograms:
+                self.action_histograms[name] = Histogram()
+            self.action_histograms[name].observe(seconds)
+
+    def render(self) -> str:
+        """Everything recorded so far in the Prometheus text exposition format"""
+        with self.lock:
+            lines = [
+                "# HELP timebox_sync_phase_seconds Duration of each sync phase.",
+                "# TYPE timebox_sync_phase_seconds histogram",
+                *histogram_lines("timebox_sync_phase_seconds", "phase", self.histograms),
+                "# HELP timebox_action_seconds Dispatched action latency, queueing included.",
+                "# TYPE timebox_action_seconds histogram",
+                *histogram_lines("timebox_action_seconds", "action", self.action_histograms),
+                "# HELP timebox_syncs_total Sync attempts by outcome.",
+                "# TYPE timebox_syncs_total counter",
+            ]
+            counters = sorted(self.counters.items())
+            for key, value in counters:
+                if key.startswith("syncs:"):
+                    lines.append(f'timebox_syncs_total{{outcome="{key[len("syncs:"):]}"}} {value}')
+
+            lines += [
+                "# HELP timebox_actions_total Dispatched actions by outcome.",
+                "# TYPE timebox_actions_total counter",
+            ]
+            for key, value in counters:
+                if key.startswith("actions:"):
+                    _, action, outcome = key.split(":", 2)
+                    lines.append(f'timebox_actions_total{{action="{action}",outcome="{outcome}"}} {value}')
+
+            for key, value in counters:
+                if not key.startswith(("syncs:", "actions:")):
+                    lines += [f"# TYPE timebox_{key}_total counter", f"timebox_{key}_total {value}"]
+        return "\n".join(lines) + "\n"
+
+    def write(self):
+        """Atomically replace the metrics file"""
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            f.write(self.render())
+        os.replace(tmp, self.path)
+
+    def start(self):
+        if not self.enabled or self.path is None:
+            return
+        self.thread = threading.Thread(target=self.loop, name="timebox-metrics", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def loop(self):
+        while True:
+            stopped = self.stopped.wait(self.interval)
+            try:
+                self.write()
+            except OSError as e:
+                logging.warning(f"Could not write metrics to {self.path}: {e}")
+            if stopped:
+                return
@@ -0,0 +1,312 @@
+import sqlite3
+import sys
+import threading
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+# Open to-dos that aren't repeating templates and whose container isn't trashed
+OPEN_WHERE = """
+    TASK.trashed = 0
+    AND TASK.status = 0
+    AND TASK.rt1_recurrenceRule IS NULL
+    AND NOT IFNULL(PROJECT.trashed, 0)
+    AND NOT IFNULL(PROJECT_OF_HEADING.trashed, 0)
+"""
+
+# Mirrors the three sources `things.today()` merges: regular Today, unconfirmed
+# scheduled and unconfirmed overdue to-dos.
+TODAY_WINDOW = """
+    (TASK.start = 1 AND TASK.startDate IS NOT NULL)
+    OR (TASK.start = 2 AND TASK.startDate <= :today)
+    OR (TASK.startDate IS NULL
+        AND TASK.deadline <= :today
+        AND TASK.deadlineSuppressionDate IS NULL)
+"""
+
+# Scheduled for a day after today, up to and including :horizon. Repeating
+# to-dos show up here through the instances Things creates ahead of time.
+UPCOMING_WINDOW = """
+    TASK.start = 2 AND TASK.startDate > :today AND TASK.startDate <= :horizon
+"""
+
+TODAY_WHERE = f"{OPEN_WHERE} AND ({TODAY_WINDOW})"
+
+# Today plus the upcoming window; with :horizon = :today this is just Today
+PLAN_WHERE = f"{OPEN_WHERE} AND ({TODAY_WINDOW} OR ({UPCOMING_WINDOW}))"
+
+CONTEXT_JOINS = """
+    LEFT JOIN TMTask AS PROJECT ON TASK.project = PROJECT.uuid
+    LEFT JOIN TMTask AS HEADING ON TASK.heading = HEADING.uuid
+    LEFT JOIN TMTask AS PROJECT_OF_HEADING ON HEADING.project = PROJECT_OF_HEADING.uuid
+"""
+
+# Tag titles are parsed once per tag rather than once per task
+TIME_TAG_CTE = """
+    TIME_TAG AS MATERIALIZED (
+        SELECT uuid, "index", tag_minutes(title) AS minutes
+        FROM TMTag
+        WHERE minutes IS NOT NULL
+    )
+"""
+
+# Today joined with the tag tables and filtered to time tags so only the rows
+# the menu needs leave SQLite. CROSS JOIN pins the join order so the Today
+# filter runs before any tag lookups.
+TODAY_TEMPLATE = """
+    WITH {time_tag}
+    SELECT
+        TASK.uuid,
+        TASK.title,
+        COALESCE(PROJECT.title, PROJECT_OF_HEADING.title, 'No Project'),
+        TIME_TAG.minutes,
+        TASK.userModificationDate
+    FROM TMTask AS TASK
+    CROSS JOIN TMTaskTag AS TAGS ON TAGS.tasks = TASK.uuid
+    CROSS JOIN TIME_TAG ON TIME_TAG.uuid = TAGS.tags
+    {joins}
+    WHERE {where}
+    ORDER BY TASK.todayIndex, TASK.startDate, TIME_TAG."index"
+"""
+
+TODAY_SQL = TODAY_TEMPLATE.format(
+    time_tag=TIME_TAG_CTE, joins=CONTEXT_JOINS, where=TODAY_WHERE
+)
+
+# One row per time-tagged task in Today and the upcoming window. Each task
+# counts with its first time tag, the one the menu would start (SQLite takes
+# bare columns from the row that min() picked); Today's overdue and
+# unconfirmed tasks count on today.
+PLANNED_CTE = f"""
+    {TIME_TAG_CTE},
+    PLANNED AS MATERIALIZED (
+        SELECT
+            TASK.uuid AS uuid,
+            CASE WHEN {TODAY_WINDOW} THEN :today ELSE TASK.startDate END AS day,
+            COALESCE(PROJECT.title, PROJECT_OF_HEADING.title, 'No Project') AS project,
+            TIME_TAG.minutes AS minutes,
+            min(TIME_TAG."index"),
+            TASK.todayIndex AS position
+        FROM TMTask AS TASK
+        CROSS JOIN TMTaskTag AS TAGS ON TAGS.tasks = TASK.uuid
+        CROSS JOIN TIME_TAG ON TIME_TAG.uuid = TAGS.tags
+        {CONTEXT_JOINS}
+        WHERE {PLAN_WHERE}
+        GROUP BY TASK.rowid
+    )
+"""
+
+# Minutes and task counts per day and project, summed in SQLite
+PLAN_SQL = f"""
+    WITH {PLANNED_CTE}
+    SELECT day, project, sum(minutes), count(*)
+    FROM PLANNED
+    GROUP BY day, project
+    ORDER BY day, min(position)
+"""
+
+# The rows behind PLAN_SQL, for summing across databases in Python
+PLAN_TASKS_SQL = f"""
+    WITH {PLANNED_CTE}
+    SELECT uuid, day, project, minutes
+    FROM PLANNED
+    ORDER BY day, position
+"""
+
+TAGS_SQL = "SELECT uuid, title FROM TMTag ORDER BY uuid"
+
+TASK_TAGS_SQL = """
+    SELECT TAG.title
+    FROM TMTaskTag AS TAGS
+    JOIN TMTag AS TAG ON TAG.uuid = TAGS.tags
+    WHERE TAGS.tasks = :uuid
+"""
+
+
+class TodayTask(NamedTuple):
+    uuid: str
+    title: str
+    project: str
+    minutes: int
+    modified: Optional[float]
+
+
+def first_tag_per_task(rows) -> List[TodayTask]:
+    """Collapse one-row-per-time-tag results, keeping the first duration of each task"""
+    tasks = []
+    seen = set()
+    for uuid, title, project, minutes, modified in rows:
+        if uuid not in seen:
+            seen.add(uuid)
+            # Every task of a project shares one name string
+            tasks.append(TodayTask(uuid, title, sys.intern(project), minutes, modified))
+    return tasks
+
+
+class DayLoad(NamedTuple):
+    day: date
+    minutes: int
+    tasks: int
+    projects: Dict[str, int]
+
+
+def things_date(day: date) -> int:
+    """Encode a date the way Things stores startDate/deadline (YYYYYYYYYYYMMMMDDDDD0000000)"""
+    return (day.year << 16) | (day.month << 12) | (day.day << 7)
+
+
+def from_things_date(value: int) -> date:
+    return date(value >> 16, (value >> 12) & 0xF, (value >> 7) & 0x1F)
+
+
+def plan_params(days: int, today: date) -> dict:
+    if days < 0:
+        raise ValueError(f"can't plan {days} days ahead")
+    return {"today": things_date(today), "horizon": things_date(today + timedelta(days))}
+
+
+def empty_loads(days: int, today: date) -> Dict[date, Tuple]:
+    """(minutes, tasks, projects) per day, to be filled in order"""
+    return {today + timedelta(offset): (0, 0, {}) for offset in range(days + 1)}
+
+
+class TodayQuery:
+    """Persistent read-only connection answering "which time-tagged tasks are in Today?"
+
+    The connection is opened once and every query is a module constant, so
+    sqlite3's statement cache keeps them prepared between syncs. Calls are serialised with a
+    lock because syncs run off the main thread.
+    """
+
+    def __init__(self, db_path: str, parse_minutes: Callable[[str], Optional[int]]):
+        self.db_path = db_path
+        self.parse_minutes = parse_minutes
+        self.lock = threading.Lock()
+        self.conn = None
+
+    @property
+    def db_paths(self) -> List[str]:
+        return [self.db_path]
+
+    def connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+            self.conn.create_function(
+                "tag_minutes", 1, self.tag_minutes, deterministic=True
+            )
+        return self.conn
+
+    def tag_minutes(self, tag: Optional[str]) -> Optional[int]:
+        # Zero-length boxes are not time tags, same as the old truthiness check
+        return (self.parse_minutes(tag) or None) if tag else None
+
+    def execute(self, sql: str, params: dict) -> list:
+        with self.lock:
+            return self.connect().execute(sql, params).fetchall()
+
+    def fetch(self, today: Optional[date] = None) -> List[TodayTask]:
+        """Return today's time-tagged tasks in Today order, first duration tag per task"""
+        params = {"today": things_date(today or date.today())}
+        return first_tag_per_task(self.execute(TODAY_SQL, params))
+
+    def data_version(self) -> int:
+        """SQLite's counter of commits made by other connections (i.e. Things)"""
+        return self.execute("PRAGMA data_version", {})[0][0]
+
+    def plan(self, days: int = 7, today: Optional[date] = None) -> List[DayLoad]:
+        """Time-tagged load of today and each of the next `days` days, empty days included"""
+        today = today or date.today()
+        loads = empty_loads(days, today)
+        for day, project, minutes, tasks in self.execute(PLAN_SQL, plan_params(days, today)):
+            total, count, projects = loads[from_things_date(day)]
+            projects[project] = minutes
+            loads[from_things_date(day)] = (total + minutes, count + tasks, projects)
+        return [DayLoad(day, *load) for day, load in loads.items()]
+
+    def planned_tasks(self, days: int = 7, today: Optional[date] = None) -> List[Tuple]:
+        """(uuid, day, project, minutes) of every task plan() sums"""
+        today = today or date.today()
+        return self.execute(PLAN_TASKS_SQL, plan_params(days, today))
+
+    def tags(self) -> Tuple:
+        """All tag (uuid, title) pairs; renaming a tag changes durations without touching tasks"""
+        return tuple(self.execute(TAGS_SQL, {}))
+
+    def task_tags(self, uuid: str) -> List[str]:
+        """Titles of one task's tags"""
+        return [title for title, in self.execute(TASK_TAGS_SQL, {"uuid": uuid})]
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+
+def unique_tasks(tasks: Iterable[TodayTask]) -> List[TodayTask]:
+    seen = set()
+    return [task for task in tasks if task.uuid not in seen and not seen.add(task.uuid)]
+
+
+class MergedTodayQuery:
+    """One Today list over several Things databases, e.g. several accounts.
+
+    Answers the same calls as TodayQuery, so IncrementalSync and SyncGate
+    work unchanged. Lists are concatenated in database order; a task found in
+    more than one database (a migrated copy) is taken from the first and
+    counts once in the plan totals.
+    """
+
+    def __init__(self, queries: List[TodayQuery]):
+        self.queries = queries
+
+    @property
+    def db_paths(self) -> List[str]:
+        return [query.db_path for query in self.queries]
+
+    @property
+    def parse_minutes(self) -> Callable[[str], Optional[int]]:
+        return self.queries[0].parse_minutes
+
+    @parse_minutes.setter
+    def parse_minutes(self, parse_minutes: Callable[[str], Optional[int]]):
+        for query in self.queries:
+            query.parse_minutes = parse_minutes
+
+    def fetch(self, today: Optional[date] = None) -> List[TodayTask]:
+        return unique_tasks(task for query in self.queries for task in query.fetch(today))
+
+    def data_version(self) -> Tuple[int, ...]:
+        return tuple(query.data_version() for query in self.queries)
+
+    def plan(self, days: int = 7, today: Optional[date] = None) -> List[DayLoad]:
+        """Summed from per-task rows, so a task in several databases counts once"""
+        today = today or date.today()
+        loads = empty_loads(days, today)
+        seen = set()
+        for query in self.queries:
+            for uuid, day, project, minutes in query.planned_tasks(days, today):
+                if uuid in seen:
+                    continue
+                seen.add(uuid)
+                total, count, projects = loads[from_things_date(day)]
+                projects[project] = projects.get(project, 0) + minutes
+                loads[from_things_date(day)] = (total + minutes, count + 1, projects)
+        return [DayLoad(day, *load) for day, load in loads.items()]
+
+    def tags(self) -> Tuple:
+        return tuple(tag for query in self.queries for tag in query.tags())
+
+    def task_tags(self, uuid: str) -> List[str]:
+        for query in self.queries:
+            tags = query.task_tags(uuid)
+            if tags:
+                return tags
+        return []
+
+    def close(self):
+        for query in self.queries:
+            query.close()
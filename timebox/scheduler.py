@@ -0,0 +1,133 @@
+import logging
+import queue
+import threading
+import time
+from typing import Callable, Optional
+
+
+class ManualClock:
+    """Stand-in for time.monotonic that only moves when told to"""
+
+    def __init__(self, start: float = 0.0):
+        self.now = start
+
+    def __call__(self) -> float:
+        return self.now
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+
+class SyncScheduler:
+    """Coalesces bursts of change events into one sync on a single worker thread.
+
+    Debouncing is trailing-edge: a sync runs `delay` seconds after the last
+    event of a burst, so the final write is always picked up, but never later
+    than `max_wait` after the first one so a steady stream of writes can't starve
+    the menu. Events that arrive while a sync is running schedule exactly one
+    follow-up. `work(force)` runs on the worker; `run_due()` can also be driven
+    by hand with a ManualClock.
+    """
+
+    def __init__(self, work: Callable[[bool], None], delay: float = 0.5,
+                 max_wait: float = 3.0, clock: Callable[[], float] = time.monotonic):
+        self.work = work
+        self.delay = delay
+        self.max_wait = max_wait
+        self.clock = clock
+        self.cond = threading.Condition()
+        self.first_event = None
+        self.last_event = None
+        self.force = False
+        self.stopped = False
+        self.thread = None
+        self.events = 0
+        self.runs = 0
+        # Seconds between the first event of the last burst and its sync starting
+        self.waited = None
+
+    def notify(self, force: bool = False):
+        """Record a change event; `force` runs the next sync right away and in full"""
+        with self.cond:
+            now = self.clock()
+            if self.first_event is None:
+                self.first_event = now
+            self.last_event = now
+            self.force = self.force or force
+            self.events += 1
+            self.cond.notify()
+
+    def due_in(self) -> Optional[float]:
+        """Seconds until the pending sync is due, or None if nothing is pending"""
+        with self.cond:
+            if self.first_event is None:
+                return None
+            if self.force:
+                return 0.0
+            deadline = min(self.last_event + self.delay, self.first_event + self.max_wait)
+            return max(0.0, deadline - self.clock())
+
+    def run_due(self) -> bool:
+        """Run the pending sync if it is due; returns whether it ran"""
+        with self.cond:
+            if self.due_in() != 0.0:
+                return False
+            force = self.force
+            self.waited = self.clock() - self.first_event
+            self.first_event = self.last_event = None
+            self.force = False
+
+        self.runs += 1
+        try:
+            self.work(force)
+        except Exception:
+            logging.exception("Sync failed")
+        return True
+
+    def start(self):
+        self.thread = threading.Thread(target=self.loop, name="timebox-sync", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        with self.cond:
+            self.stopped = True
+            self.cond.notify()
+        if self.thread is not None:
+            self.thread.join()
+
+    def loop(self):
+        while True:
+            with self.cond:
+                while not self.stopped and self.due_in() != 0.0:
+                    self.cond.wait(self.due_in())
+                if self.stopped:
+                    return
+            self.run_due()
+
+
+class MainThreadQueue:
+    """Hands UI updates from worker threads to the main thread.
+
+    `wake` is called after every put and should arrange for `drain()` to run on
+    the main thread (AppHelper.callAfter under AppKit); without it the owner
+    drains the queue itself.
+    """
+
+    def __init__(self, wake: Optional[Callable[[], None]] = None):
+        self.queue = queue.SimpleQueue()
+        self.wake = wake
+
+    def put(self, fn: Callable, *args):
+        self.queue.put((fn, args))
+        if self.wake is not None:
+            self.wake()
+
+    def drain(self) -> int:
+        count = 0
+        while True:
+            try:
+                fn, args = self.queue.get_nowait()
+            except queue.Empty:
+                return count
+            fn(*args)
+            count += 1
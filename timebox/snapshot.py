@@ -0,0 +1,91 @@
+import json
+import logging
+import os
+import sys
+import tempfile
+from datetime import date
+from typing import List, NamedTuple, Optional
+
+from timebox.query import DayLoad, TodayTask
+from timebox.sync import IncrementalSync
+
+VERSION = 4
+
+
+class Snapshot(NamedTuple):
+    """The Today list of one day.
+
+    Restoring it lets the menu render before the database is opened; the
+    first sync then diffs the live list against it and leaves the menu alone
+    if nothing changed in the meantime.
+    """
+    day: date
+    tasks: List[TodayTask]
+    plan: Optional[List[DayLoad]] = None
+
+    @classmethod
+    def capture(cls, task_sync: IncrementalSync, plan: Optional[List[DayLoad]] = None, day: Optional[date] = None) -> "Snapshot":
+        return cls(
+            day or date.today(),
+            [task_sync.tasks[uuid] for uuid in task_sync.order],
+            plan
+        )
+
+    def restore(self, task_sync: IncrementalSync):
+        task_sync.restore(self.tasks)
+
+
+def save_snapshot(path: str, snapshot: Snapshot):
+    """Write the snapshot atomically; a crash mid-write leaves the previous one intact"""
+    data = json.dumps({
+        "version": VERSION,
+        "day": snapshot.day.isoformat(),
+        "tasks": snapshot.tasks,
+        "plan": snapshot.plan and [
+            (load.day.isoformat(), load.minutes, load.tasks, load.projects)
+            for load in snapshot.plan
+        ],
+    }, separators=(",", ":"))
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".snapshot-")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def load_snapshot(path: str) -> Optional[Snapshot]:
+    """Read a snapshot written by save_snapshot; None if missing, unreadable or outdated"""
+    try:
+        with open(path) as f:
+            data = json.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable snapshot {path}: {e}")
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != VERSION:
+        return None
+    try:
+        return Snapshot(
+            date.fromisoformat(data["day"]),
+            [
+                TodayTask(uuid, title, sys.intern(project), minutes, modified)
+                for uuid, title, project, minutes, modified in data["tasks"]
+            ],
+            data["plan"] and [
+                DayLoad(date.fromisoformat(day), minutes, tasks, projects)
+                for day, minutes, tasks, projects in data["plan"]
+            ]
+        )
+    except (KeyError, TypeError, ValueError) as e:
+        logging.warning(f"Ignoring malformed snapshot {path}: {e}")
+        return None
@@ -0,0 +1,128 @@
+import logging
+import sqlite3
+from datetime import date
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from timebox.query import TodayQuery, TodayTask
+
+# project -> uuid -> task, both in Today order
+TaskMap = Dict[str, Dict[str, TodayTask]]
+
+
+class ChangeSet(NamedTuple):
+    added: List[TodayTask]
+    removed: List[TodayTask]
+    updated: List[TodayTask]
+    reordered: bool = False
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.updated or self.reordered)
+
+
+def task_url(uuid: str) -> str:
+    return f"things:///show?id={uuid}"
+
+
+def build_task_map(tasks: List[TodayTask]) -> TaskMap:
+    """Group tasks into the project -> uuid -> task map the menu consumes.
+
+    Keyed by uuid so same-named tasks in one project both show up. The map
+    holds the TodayTask records themselves, so an unchanged task costs no new
+    allocation from one sync to the next.
+    """
+    processed_tasks = {}
+    for task in tasks:
+        if task.project not in processed_tasks:
+            processed_tasks[task.project] = {}
+        processed_tasks[task.project][task.uuid] = task
+    return processed_tasks
+
+
+class IncrementalSync:
+    """Keeps the Today task list current and reports what changed.
+
+    Each sync is one fetch() of the time-tagged Today tasks, diffed in Python
+    against the list remembered from the last sync. Working out which tasks
+    changed from per-task stamps cost more than reading them all: the stamps
+    scan the same candidates as the fetch. Unchanged tasks keep their existing
+    TodayTask records, and skipping syncs altogether is left to SyncGate.
+    """
+
+    def __init__(self, query: TodayQuery):
+        self.query = query
+        self.tasks: Dict[str, TodayTask] = {}
+        self.order: List[str] = []
+
+    def sync(self, today: Optional[date] = None) -> Tuple[TaskMap, ChangeSet]:
+        """Bring the cached list up to date and return (project map, changes)"""
+        fetched = self.query.fetch(today or date.today())
+
+        added, updated = [], []
+        tasks = {}
+        for task in fetched:
+            old = self.tasks.get(task.uuid)
+            if old is None:
+                added.append(task)
+            elif old == task:
+                task = old
+            elif old[:4] != task[:4]:
+                updated.append(task)
+            tasks[task.uuid] = task
+        removed = [task for uuid, task in self.tasks.items() if uuid not in tasks]
+
+        order = list(tasks)
+        reordered = not added and not removed and order != self.order
+
+        self.tasks = tasks
+        self.order = order
+        return self.task_map(), ChangeSet(added, removed, updated, reordered)
+
+    def task_map(self) -> TaskMap:
+        """The project map as of the last sync, without touching the database"""
+        return build_task_map([self.tasks[uuid] for uuid in self.order])
+
+    def restore(self, tasks: List[TodayTask]):
+        """Resume from a saved list, so the next sync reports changes against it"""
+        self.tasks = {task.uuid: task for task in tasks}
+        self.order = list(self.tasks)
+
+    def reset(self):
+        """Forget everything so the next sync reports every task as added"""
+        self.tasks = {}
+        self.order = []
+
+
+class SyncGate:
+    """Decides whether a database event is worth a sync.
+
+    Watchdog reports WAL and checkpoint writes that carry no new commit.
+    `PRAGMA data_version` rules those out for the price of a pragma. Anything
+    finer, like fingerprinting the Today rows, scans the same candidates as
+    the sync itself, so every real commit syncs and an unchanged result
+    leaves the menu alone.
+    """
+
+    def __init__(self, query: TodayQuery):
+        self.query = query
+        self.data_version = None
+        self.executed = 0
+        self.suppressed = 0
+
+    def should_sync(self) -> bool:
+        try:
+            data_version = self.query.data_version()
+        except sqlite3.Error as e:
+            # Let the sync itself surface the problem
+            logging.warning(f"Could not read the Things data version: {e}")
+            self.executed += 1
+            return True
+
+        if data_version == self.data_version:
+            self.suppressed += 1
+            return False
+        self.data_version = data_version
+        self.executed += 1
+        return True
+
+    def stats(self) -> str:
+        return f"{self.executed} executed, {self.suppressed} suppressed"
@@ -0,0 +1,48 @@
+import re
+from functools import lru_cache
+from typing import Dict, Hashable, Iterable, Tuple
+
+# 1h, 1.5h, 1h30m, 90min, 45 m, 2 hours 15 minutes
+UNITS_RE = re.compile(
+    r"(?:(?P<hours>\d+(?:\.\d+)?)h(?:rs?|ours?)?)?"
+    r"(?:(?P<minutes>\d+)m(?:ins?|inutes?)?)?"
+)
+# :30, 1:30
+CLOCK_RE = re.compile(r"(?P<hours>\d*):(?P<minutes>[0-5]\d)")
+
+
+@lru_cache(maxsize=1024)
+def extract_minutes(tag: str) -> int | None:
+    """Extract minutes from time tags like '30min', '30 m', '1h', '1h30m', '1.5h' or ':30'
+
+    Results are memoized per raw tag string; a Things library only has a
+    handful of distinct tags, so after the first sync this is a dict lookup.
+    """
+    tag = tag.lower().replace(' ', '')
+    if not tag:
+        return None
+
+    if match := CLOCK_RE.fullmatch(tag):
+        return int(match['hours'] or 0) * 60 + int(match['minutes'])
+
+    match = UNITS_RE.fullmatch(tag)
+    if not match or not (match['hours'] or match['minutes']):
+        return None
+    hours, minutes = match['hours'], match['minutes']
+    if hours and '.' in hours and minutes:
+        return None  # "1.5h30m" is ambiguous
+    return round(float(hours or 0) * 60) + int(minutes or 0)
+
+
+def first_durations(task_tags: Iterable[Tuple[Hashable, Iterable[str]]]) -> Dict[Hashable, int]:
+    """Resolve every task's tags in one pass, keeping the first time tag per task
+
+    Tasks without a time tag (or with only zero-length ones) are left out.
+    """
+    durations = {}
+    for task, tags in task_tags:
+        for tag in tags:
+            if minutes := extract_minutes(tag):
+                durations[task] = minutes
+                break
+    return durations
@@ -0,0 +1,52 @@
+import logging
+from typing import List, Optional
+
+from timebox.locate import DBLocator, default_locator
+from timebox.query import MergedTodayQuery, TodayQuery
+from timebox.sync import TaskMap, build_task_map
+from timebox.tags import extract_minutes
+
+_locator = None
+_today_query = None
+
+def get_locator() -> DBLocator:
+    """The shared database locator; resolving is cached until a container changes"""
+    global _locator
+    if _locator is None:
+        _locator = default_locator()
+    return _locator
+
+def get_things_db_path() -> str:
+    """Get the path to the newest Things database"""
+    return get_locator().path()
+
+def open_today_query(db_paths: List[str]):
+    """A TodayQuery, or a MergedTodayQuery over several databases"""
+    if not db_paths:
+        raise FileNotFoundError("Could not find Things database")
+    queries = [TodayQuery(db_path, extract_minutes) for db_path in db_paths]
+    return queries[0] if len(queries) == 1 else MergedTodayQuery(queries)
+
+def get_today_query(db_path: Optional[str] = None):
+    """Get the shared read-only query engine for the Things database(s).
+
+    Reopened when the located databases change, e.g. after signing in to
+    another account; callers holding the old one should compare identity.
+    """
+    global _today_query
+    db_paths = [db_path] if db_path else get_locator().paths()
+    if _today_query is None or db_paths != _today_query.db_paths:
+        if _today_query is not None:
+            logging.info(f"Things databases changed: {', '.join(db_paths) or 'none'}")
+            _today_query.close()
+            _today_query = None
+        _today_query = open_today_query(db_paths)
+    return _today_query
+
+def get_todays_tasks() -> TaskMap:
+    """Get today's tasks from Things, organized by project"""
+    try:
+        return build_task_map(get_today_query().fetch())
+    except Exception as e:
+        logging.error(f"Error fetching tasks: {e}")
+        return {}
@@ -0,0 +1,133 @@
+import logging
+import sqlite3
+import threading
+from typing import Callable, List, NamedTuple, Optional
+
+from timebox.tags import extract_minutes
+
+DEFAULT_MINUTES = 60
+
+# The legacy "Things Interval" query: started Today to-dos with at least one
+# tag, in Today order. Rows come one per tag; the first time tag wins.
+UP_NEXT_SQL = """
+    SELECT TASK.uuid, TASK.title, TAG.title
+    FROM TMTask AS TASK
+    JOIN TMTaskTag AS TAGS ON TAGS.tasks = TASK.uuid
+    JOIN TMTag AS TAG ON TAGS.tags = TAG.uuid
+    WHERE TASK.trashed = 0 AND TASK.status = 0 AND TASK.type = 0
+    AND TASK.start = 1
+    AND TASK.startDate IS NOT NULL
+    ORDER BY TASK.todayIndex
+    LIMIT 100
+"""
+
+
+class UpNext(NamedTuple):
+    uuid: str
+    title: str
+    minutes: Optional[int]
+
+    @property
+    def url(self) -> str:
+        return f"things:///show?id={self.uuid}"
+
+
+class TaskQueue:
+    """An ordered cursor over today's tasks for the one-task-at-a-time timer.
+
+    The query runs once and is only rerun when `PRAGMA data_version` says
+    Things committed something since. `prefetch()` does that check on a
+    background thread while a box runs, so `current()` and `advance()` only
+    touch memory. After a reload the cursor follows the current task by uuid,
+    so completing the finished task in Things doesn't skip the next one.
+    """
+
+    def __init__(self, db_path: str, parse_minutes: Callable[[str], Optional[int]] = extract_minutes):
+        self.db_path = db_path
+        self.parse_minutes = parse_minutes
+        # `lock` serializes database access, `cursor_lock` guards tasks and
+        # position and is never held across a query
+        self.lock = threading.Lock()
+        self.cursor_lock = threading.Lock()
+        self.conn = None
+        self.data_version = None
+        self.tasks: List[UpNext] = []
+        self.position = 0
+        self.prefetching = None
+        self.loads = 0
+
+    def connect(self) -> sqlite3.Connection:
+        if self.conn is None:
+            self.conn = sqlite3.connect(
+                f"file:{self.db_path}?mode=ro",
+                uri=True,
+                check_same_thread=False
+            )
+        return self.conn
+
+    def load(self, rows) -> List[UpNext]:
+        tasks, seen = [], {}
+        for uuid, title, tag in rows:
+            minutes = self.parse_minutes(tag) if tag else None
+            if uuid not in seen:
+                seen[uuid] = len(tasks)
+                tasks.append(UpNext(uuid, title, minutes))
+            elif minutes and not tasks[seen[uuid]].minutes:
+                tasks[seen[uuid]] = tasks[seen[uuid]]._replace(minutes=minutes)
+        return tasks
+
+    def refresh(self) -> bool:
+        """Reload if the database changed since the last load; returns whether it did"""
+        with self.lock:
+            try:
+                conn = self.connect()
+                data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+                if data_version == self.data_version:
+                    return False
+                tasks = self.load(conn.execute(UP_NEXT_SQL))
+            except sqlite3.Error as e:
+                # Keep serving the last good list
+                logging.error(f"Could not read Things tasks: {e}")
+                return False
+            self.data_version = data_version
+            self.loads += 1
+
+        with self.cursor_lock:
+            current = self.current()
+            self.position = 0
+            if current is not None:
+                for position, task in enumerate(tasks):
+                    if task.uuid == current.uuid:
+                        self.position = position
+                        break
+            self.tasks = tasks
+        return True
+
+    def prefetch(self):
+        """Refresh on a background thread; at most one runs at a time"""
+        if self.prefetching is not None and self.prefetching.is_alive():
+            return
+        self.prefetching = threading.Thread(target=self.refresh, name="timebox-upnext", daemon=True)
+        self.prefetching.start()
+
+    def current(self) -> Optional[UpNext]:
+        tasks, position = self.tasks, self.position
+        return tasks[position] if position < len(tasks) else None
+
+    def current_minutes(self) -> int:
+        current = self.current()
+        return (current and current.minutes) or DEFAULT_MINUTES
+
+    def advance(self) -> Optional[UpNext]:
+        """Move the cursor past the current task and return it"""
+        with self.cursor_lock:
+            finished = self.current()
+            if finished is not None:
+                self.position += 1
+            return finished
+
+    def close(self):
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
@@ -0,0 +1,46 @@
+from pathlib import Path
+from typing import Iterable
+
+from watchdog.events import FileSystemEventHandler
+
+from timebox.locate import DBLocator
+from timebox.metrics import SyncMetrics
+from timebox.scheduler import SyncScheduler
+
+
+class ThingsDBHandler(FileSystemEventHandler):
+    """Turns watchdog events for the Things database into scheduler notifications.
+
+    Runs on the observer's thread, which can deliver hundreds of events a
+    second during an import or a cloud catch-up, so it only filters by file
+    name and notifies; bursts are coalesced by the scheduler and nothing is
+    read here.
+    """
+
+    def __init__(self, scheduler: SyncScheduler, metrics: SyncMetrics, names: Iterable[str]):
+        self.scheduler = scheduler
+        self.metrics = metrics
+        self.names = frozenset(names)
+
+    def on_modified(self, event):
+        if Path(event.src_path).name in self.names:
+            self.metrics.count("change_events")
+            self.scheduler.notify()
+
+
+class ContainerHandler(FileSystemEventHandler):
+    """Re-resolves the databases when a directory appears in or leaves a Things
+    container, e.g. a ThingsData-* directory for a newly signed-in account.
+
+    The next sync reopens the query and moves the database watches if the
+    located paths changed; file events in the container are ignored.
+    """
+
+    def __init__(self, scheduler: SyncScheduler, locator: DBLocator):
+        self.scheduler = scheduler
+        self.locator = locator
+
+    def on_any_event(self, event):
+        if event.is_directory and event.event_type in ("created", "deleted", "moved"):
+            self.locator.invalidate()
+            self.scheduler.notify()
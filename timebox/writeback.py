@@ -0,0 +1,143 @@
+import json
+import logging
+import threading
+from typing import Callable, Dict, List, Optional, Sequence
+from urllib.parse import quote
+
+from timebox.actions import ActionDispatcher
+from timebox.tags import extract_minutes
+
+# Things processes at most 250 items per json command
+MAX_ITEMS = 250
+# Stay well inside what `open` and LaunchServices pass through
+MAX_URL = 32 * 1024
+
+
+def json_url(items: Sequence[str], token: Optional[str]) -> str:
+    """things:///json for already-encoded items"""
+    token_param = f"auth-token={quote(token, safe='')}&" if token else ""
+    return f"things:///json?{token_param}data={quote('[' + ','.join(items) + ']', safe='')}"
+
+
+class WriteBack:
+    """Batches edits to Things to-dos into as few things:///json calls as possible.
+
+    complete(), append_notes() and retag() only record the edit; edits to the
+    same to-do coalesce (notes are joined, the last retag wins). `delay`
+    seconds after the first pending edit, or on flush(), they are encoded as
+    update operations and split into URLs of at most `max_items` items and
+    `max_url` characters, each launched through `dispatcher` as one
+    `open -g`. Updating to-dos needs the Things auth token
+    (Settings > General > Enable Things URLs > Manage).
+
+    Retagging swaps the to-do's time tag for the existing time tag closest to
+    the real duration: Things ignores tags that don't exist. `tags_of(uuid)`
+    and `time_tags()` are read when flushing, on the flush thread.
+    """
+
+    def __init__(self, dispatcher: ActionDispatcher, token: Optional[str] = None,
+                 delay: float = 5.0, max_items: int = MAX_ITEMS, max_url: int = MAX_URL,
+                 tags_of: Optional[Callable[[str], List[str]]] = None,
+                 time_tags: Optional[Callable[[], List[str]]] = None,
+                 parse_minutes: Callable[[str], Optional[int]] = extract_minutes):
+        self.dispatcher = dispatcher
+        self.token = token
+        self.delay = delay
+        self.max_items = max_items
+        self.max_url = max_url
+        self.tags_of = tags_of
+        self.time_tags = time_tags
+        self.parse_minutes = parse_minutes
+        self.lock = threading.Lock()
+        self.pending: Dict[str, dict] = {}
+        self.timer = None
+        self.edits = 0
+        self.calls = 0
+
+    def edit(self, uuid: str) -> dict:
+        """The pending edit for a to-do; call with the lock held"""
+        self.edits += 1
+        if uuid not in self.pending:
+            self.pending[uuid] = {}
+            if self.timer is None and self.delay is not None:
+                self.timer = threading.Timer(self.delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+        return self.pending[uuid]
+
+    def complete(self, uuid: str):
+        with self.lock:
+            self.edit(uuid)["completed"] = True
+
+    def append_notes(self, uuid: str, text: str):
+        with self.lock:
+            edit = self.edit(uuid)
+            edit["notes"] = f"{edit['notes']}\n{text}" if "notes" in edit else text
+
+    def retag(self, uuid: str, minutes: int):
+        with self.lock:
+            self.edit(uuid)["minutes"] = minutes
+
+    def closest_time_tag(self, minutes: int) -> Optional[str]:
+        durations = [
+            (abs(tag_minutes - minutes), tag_minutes, tag)
+            for tag in self.time_tags() if (tag_minutes := self.parse_minutes(tag))
+        ]
+        return min(durations)[2] if durations else None
+
+    def attributes(self, uuid: str, edit: dict) -> dict:
+        attributes = {}
+        if "notes" in edit:
+            attributes["append-notes"] = f"\n{edit['notes']}"
+        if "minutes" in edit and self.tags_of and self.time_tags:
+            tag = self.closest_time_tag(edit["minutes"])
+            if tag is not None:
+                kept = [title for title in self.tags_of(uuid) if not self.parse_minutes(title)]
+                attributes["tags"] = kept + [tag]
+        if edit.get("completed"):
+            attributes["completed"] = True
+        return attributes
+
+    def urls(self, pending: Dict[str, dict]) -> List[str]:
+        """Encode pending edits into as few URLs as the limits allow"""
+        urls, batch, size = [], [], len(json_url([], self.token))
+        for uuid, edit in pending.items():
+            attributes = self.attributes(uuid, edit)
+            if not attributes:
+                continue
+            item = json.dumps({
+                "type": "to-do", "operation": "update", "id": uuid, "attributes": attributes
+            }, ensure_ascii=False, separators=(",", ":"))
+            # quote() works per character, so sizes add up (plus 3 for the comma)
+            item_size = len(quote(item, safe="")) + 3
+            if batch and (len(batch) >= self.max_items or size + item_size > self.max_url):
+                urls.append(json_url(batch, self.token))
+                batch, size = [], len(json_url([], self.token))
+            if size + item_size > self.max_url:
+                logging.warning(f"Dropping write-back for {uuid}: {item_size} characters is too long")
+                continue
+            batch.append(item)
+            size += item_size
+        if batch:
+            urls.append(json_url(batch, self.token))
+        return urls
+
+    def flush(self) -> List[str]:
+        """Send everything pending now; returns the URLs launched"""
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+        if not pending:
+            return []
+        try:
+            urls = self.urls(pending)
+        except Exception as e:
+            logging.error(f"Could not encode {len(pending)} Things updates: {e}")
+            return []
+        for url in urls:
+            self.calls += 1
+            self.dispatcher.run("writeback", ["open", "-g", url])
+        logging.info(f"Wrote back {len(pending)} to-dos in {len(urls)} Things calls")
+        return urls